@@ -2,13 +2,78 @@
 
 import os
 import re
+import mmap
+import time
+import hashlib
 import argparse
 import subprocess
+import tempfile
 from datetime import datetime
-from collections import defaultdict, Counter
+from collections import Counter
 import sys
 
-def run_ausearch(audit_log_path, start_time=None, end_time=None, debug=False):
+# aN=value arguments of an EXECVE record
+ARG_RE = re.compile(rb'\ba(\d+)=("[^"]*"|\S+)')
+
+MONTHS = {"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+          "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12}
+
+BLOCK_SEP = b"----\n"
+READ_SIZE = 1 << 20
+
+# msg=audit(1716300185.123:4567): epoch seconds and event serial of a raw audit.log line
+RAW_TS_RE = re.compile(rb'audit\((\d+)\.\d+:(\d+)\)')
+GZIP_MAGIC = b"\x1f\x8b"
+# Lines over which the records of one event may be spread in a raw audit.log
+EVENT_WINDOW = 512
+
+def split_blocks(chunks):
+    """Yield the non-empty ----\\n separated blocks from an iterable of byte buffers."""
+    tail = b""
+    for chunk in chunks:
+        buf = tail + chunk if tail else chunk
+        pos = 0
+        while True:
+            sep = buf.find(BLOCK_SEP, pos)
+            if sep == -1:
+                break
+            if sep > pos:
+                yield buf[pos:sep]
+            pos = sep + len(BLOCK_SEP)
+        tail = buf[pos:]
+    if tail:
+        yield tail
+
+def ausearch_cache_path(audit_log_path, start_time=None, end_time=None):
+    """Cache file for one ausearch run, keyed by log path, log mtime and time window.
+
+    A missing bound is fine (the window is open on that side). Returns None when a
+    given bound is not an absolute ISO time: relative ausearch keywords such as
+    'today' or 'recent' mean a different window on every run.
+    """
+    try:
+        start_ts = parse_time_arg(start_time) if start_time else None
+        end_ts = parse_time_arg(end_time) if end_time else None
+    except ValueError:
+        return None
+    cache_dir = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "sospy")
+    key = f"{os.path.abspath(audit_log_path)}|{os.path.getmtime(audit_log_path)}|{start_ts}|{end_ts}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".txt")
+
+def iter_cached_blocks(cache_file):
+    """Yield blocks from a cached ausearch dump through a read-only mmap."""
+    with open(cache_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from split_blocks((mm,))
+
+def iter_ausearch_blocks(audit_log_path, start_time=None, end_time=None, debug=False, cache_file=None):
+    """Run ausearch and yield its output one record block (bytes) at a time.
+
+    If cache_file is given, the raw output is also written there (via a
+    temporary file renamed into place once ausearch succeeds).
+    """
     cmd = ["ausearch", "-if", audit_log_path]
     if start_time:
         cmd.extend(["--start", start_time])
@@ -16,115 +81,277 @@ def run_ausearch(audit_log_path, start_time=None, end_time=None, debug=False):
         cmd.extend(["--end", end_time])
     if debug:
         print(f"[DEBUG] Running command: {' '.join(cmd)}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"ausearch failed: {result.stderr.strip()}")
-    return result.stdout
-
-def parse_ausearch_output(output):
-    blocks = output.split("----\n")
-    event_counts = defaultdict(int)
+
+    dump = None
+    if cache_file:
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            dump = tempfile.NamedTemporaryFile(dir=os.path.dirname(cache_file), delete=False)
+        except OSError:
+            dump = None  # Unwritable cache dir; run uncached
+
+    def read_chunks(stream):
+        for chunk in iter(lambda: stream.read(READ_SIZE), b""):
+            if dump:
+                dump.write(chunk)
+            yield chunk
+
+    try:
+        # stderr goes to a file, not a pipe: an unread pipe could fill up and stall ausearch
+        with tempfile.TemporaryFile() as errfile:
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errfile, bufsize=READ_SIZE) as proc:
+                yield from split_blocks(read_chunks(proc.stdout))
+            if proc.returncode != 0:
+                errfile.seek(0)
+                stderr = errfile.read()
+                raise RuntimeError(f"ausearch failed: {stderr.decode(errors='replace').strip()}")
+        if dump:
+            dump.close()
+            os.replace(dump.name, cache_file)
+            dump = None
+    finally:
+        if dump:
+            dump.close()
+            os.unlink(dump.name)
+
+def _line_start(mm, pos):
+    """Offset of the first line that starts at or after pos."""
+    if pos == 0:
+        return 0
+    nl = mm.find(b"\n", pos - 1)
+    return len(mm) if nl == -1 else nl + 1
+
+def _raw_line_time(mm, pos):
+    """Epoch seconds and serial of the raw audit line starting at pos, or (None, None)."""
+    end = mm.find(b"\n", pos)
+    match = RAW_TS_RE.search(mm, pos, len(mm) if end == -1 else end)
+    return (int(match.group(1)), match.group(2)) if match else (None, None)
+
+def _seek_raw_time(mm, start_ts):
+    """Binary-search a time-ordered audit.log mapping for the first line at or after start_ts."""
+    lo, hi = 0, len(mm)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        pos = _line_start(mm, mid)
+        if pos >= len(mm):
+            hi = mid
+            continue
+        ts, _ = _raw_line_time(mm, pos)
+        if ts is None or ts >= start_ts:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _line_start(mm, lo)
+
+def is_plain_audit_log(audit_log_path):
+    """True if the log can be scanned directly (not empty, not gzip-compressed)."""
+    with open(audit_log_path, "rb") as f:
+        head = f.read(2)
+    return bool(head) and head != GZIP_MAGIC
+
+def _event_block(mm, event):
+    """time-> header followed by every line collected for one event."""
+    header, slices, _ = event
+    return header + b"".join(mm[start:end] for start, end in slices)
+
+def iter_audit_log_blocks(audit_log_path, start_ts, end_ts=None):
+    """Yield ausearch-shaped blocks straight from a raw audit.log for [start_ts, end_ts].
+
+    The log is mmapped and binary-searched for start_ts, then scanned
+    linearly. Records from different CPUs can interleave, so lines are
+    grouped by event serial and an event is yielded once its serial has not
+    been seen for EVENT_WINDOW lines. Each block is prefixed with a time->
+    line so that parse_ausearch_output() handles it like ausearch output.
+    The scan stops EVENT_WINDOW lines after the last record inside the range.
+    """
+    with open(audit_log_path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = _seek_raw_time(mm, start_ts)
+        size = len(mm)
+        pending = {}  # serial -> [header, [[start, end], ...], last line seen], first-seen order
+        current = None
+        line_no = last_in_range = 0
+        while pos < size:
+            nl = mm.find(b"\n", pos)
+            end = size if nl == -1 else nl + 1
+            line_no += 1
+            ts, serial = _raw_line_time(mm, pos)
+            if ts is not None:
+                if ts < start_ts or (end_ts is not None and ts > end_ts):
+                    current = None
+                    if end_ts is not None and ts > end_ts and line_no - last_in_range > EVENT_WINDOW:
+                        break
+                else:
+                    last_in_range = line_no
+                    current = pending.get(serial)
+                    if current is None:
+                        stamp = time.strftime("%a %b %d %H:%M:%S %Y", time.localtime(ts))
+                        current = pending[serial] = [b"time->" + stamp.encode() + b"\n", [], line_no]
+                    current[2] = line_no
+            if current is not None:
+                # Lines without an audit stamp continue the record before them
+                slices = current[1]
+                if slices and slices[-1][1] == pos:
+                    slices[-1][1] = end
+                else:
+                    slices.append([pos, end])
+            pos = end
+            # The oldest pending event is complete once its serial has gone quiet
+            while pending:
+                oldest = next(iter(pending))
+                if line_no - pending[oldest][2] <= EVENT_WINDOW:
+                    break
+                yield _event_block(mm, pending.pop(oldest))
+        for event in pending.values():
+            yield _event_block(mm, event)
+
+def parse_time_arg(value):
+    """Epoch seconds for a --start/--end value such as '2024-05-21 00:00:00'."""
+    return datetime.fromisoformat(value).timestamp()
+
+def parse_event_time(time_str):
+    """Parse ausearch's 'Tue May 21 14:23:05 2024' without going through strptime."""
+    parts = time_str.split()
+    hh, mm, ss = parts[3].split(":")
+    return datetime(int(parts[4]), MONTHS[parts[1]], int(parts[2]), int(hh), int(mm), int(ss))
+
+def _find_line(block, prefix):
+    """Offset of the first line in block that starts with prefix, or -1."""
+    if block.startswith(prefix):
+        return 0
+    pos = block.find(b"\n" + prefix)
+    return pos + 1 if pos != -1 else -1
+
+def _line_end(block, pos):
+    end = block.find(b"\n", pos)
+    return len(block) if end == -1 else end
+
+def _track_seen(details, key, event_time):
+    """Update the [occurrences, first_seen, last_seen] entry for key."""
+    seen = details.get(key)
+    if seen is None:
+        details[key] = [1, event_time, event_time]
+    else:
+        seen[0] += 1
+        if event_time < seen[1]:
+            seen[1] = event_time
+        elif event_time > seen[2]:
+            seen[2] = event_time
+
+def parse_ausearch_output(blocks, track_details=False):
+    event_types = []
     timestamps = []
-    command_counter = Counter()
-    command_timestamps = defaultdict(list)
-    comm_counter = Counter()
-    comm_timestamps = defaultdict(list)
+    commands = []
+    command_details = {}
+    comms = []
+    comm_details = {}
 
     for block in blocks:
-        lines = block.strip().splitlines()
         event_type = None
         event_time = None
         argv = {}
         is_execve = False
         comm_val = None
 
-        for line in lines:
-            if line.startswith("type=EXECVE"):
-                is_execve = True
-            if line.startswith("type=") and not event_type:
-                match = re.search(r"type=(\w+)", line)
-                if match:
-                    event_type = match.group(1)
-            if line.startswith("time->") and not event_time:
-                try:
-                    event_time = datetime.strptime(line.split("->", 1)[1].strip(), "%a %b %d %H:%M:%S %Y")
-                    timestamps.append(event_time)
-                except ValueError:
-                    pass
-            if "comm=" in line and not comm_val:
-                match = re.search(r'comm="([^"]+)"', line)
-                if match:
-                    comm_val = match.group(1)
-            arg_match = re.findall(r'a(\d+)=(".*?"|\S+)', line)
-            for idx, val in arg_match:
-                argv[int(idx)] = val.strip('"')
-
-        if event_type:
-            event_counts[event_type] += 1
-        else:
-            event_counts["UNKNOWN"] += 1
+        pos = _find_line(block, b"type=")
+        if pos != -1:
+            end = _line_end(block, pos)
+            space = block.find(b" ", pos, end)
+            event_type = block[pos + 5:end if space == -1 else space].decode(errors="replace")
+
+        pos = _find_line(block, b"time->")
+        if pos != -1:
+            try:
+                event_time = parse_event_time(block[pos + 6:_line_end(block, pos)].decode())
+                timestamps.append(event_time)
+            except (IndexError, KeyError, ValueError):
+                pass
+
+        pos = block.find(b'comm="')
+        if pos != -1:
+            end = block.find(b'"', pos + 6)
+            if end != -1:
+                comm_val = block[pos + 6:end].decode(errors="replace")
+
+        # Only EXECVE records carry argv; SYSCALL a0..a3 are raw registers
+        pos = _find_line(block, b"type=EXECVE")
+        if pos != -1:
+            is_execve = True
+            for idx, val in ARG_RE.findall(block, pos, _line_end(block, pos)):
+                argv[int(idx)] = val.strip(b'"').decode(errors="replace")
+
+        event_types.append(event_type or "UNKNOWN")
 
         if is_execve and argv:
             command = ' '.join(argv[i] for i in sorted(argv))
-            command_counter[command] += 1
-            if event_time:
-                command_timestamps[command].append(event_time)
+            commands.append(command)
+            if track_details and event_time:
+                _track_seen(command_details, command, event_time)
 
         if comm_val:
-            comm_counter[comm_val] += 1
-            if event_time:
-                comm_timestamps[comm_val].append(event_time)
+            comms.append(comm_val)
+            if track_details and event_time:
+                _track_seen(comm_details, comm_val, event_time)
+
+    # Count once at the end so the increments run inside Counter's C loop
+    event_counts = Counter(event_types)
+    command_counter = Counter(commands)
+    comm_counter = Counter(comms)
 
     summary = {
         "start_time": min(timestamps).isoformat() if timestamps else None,
         "end_time": max(timestamps).isoformat() if timestamps else None,
         "event_counts": dict(event_counts),
-        "total_events": sum(event_counts.values()),
+        "total_events": len(event_types),
         "top_commands": command_counter.most_common(10),
-        "command_timestamps": command_timestamps,
+        "command_details": command_details,
         "top_comm": comm_counter.most_common(10),
-        "comm_timestamps": comm_timestamps
+        "comm_details": comm_details
     }
 
     return summary
 
 def print_summary(summary):
-    print("\n=== Audit Log Summary ===")
-    print(f"Start Time   : {summary['start_time']}")
-    print(f"End Time     : {summary['end_time']}")
-    print("\nEvent Type Counts:")
+    out = ["\n=== Audit Log Summary ==="]
+    out.append(f"Start Time   : {summary['start_time']}")
+    out.append(f"End Time     : {summary['end_time']}")
+    out.append("\nEvent Type Counts:")
     for evt, count in sorted(summary['event_counts'].items()):
-        print(f"  {evt:<15} {count}")
-    print(f"\nTotal Events : {summary['total_events']}\n")
+        out.append(f"  {evt:<15} {count}")
+    out.append(f"\nTotal Events : {summary['total_events']}\n")
 
     if summary["top_commands"]:
-        print("Top 10 Commands (EXECVE):")
+        out.append("Top 10 Commands (EXECVE):")
         for cmd, count in summary["top_commands"]:
-            print(f"  {cmd:<50} {count}")
-        print("")
+            out.append(f"  {cmd:<50} {count}")
+        out.append("")
 
     if summary["top_comm"]:
-        print("Top 10 Processes (comm=):")
+        out.append("Top 10 Processes (comm=):")
         for comm, count in summary["top_comm"]:
-            print(f"  {count:>5} comm=\"{comm}\"")
-        print("")
+            out.append(f"  {count:>5} comm=\"{comm}\"")
+        out.append("")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 def show_command_details(summary, query):
-    cmd_times = summary['command_timestamps'].get(query)
-    comm_times = summary['comm_timestamps'].get(query)
-
-    if cmd_times:
-        print(f"\n=== Details for Command (EXECVE): '{query}' ===")
-        print(f"Occurrences : {len(cmd_times)}")
-        print(f"First Seen  : {min(cmd_times).isoformat()}")
-        print(f"Last Seen   : {max(cmd_times).isoformat()}")
-    elif comm_times:
-        print(f"\n=== Details for Process (comm=): '{query}' ===")
-        print(f"Occurrences : {len(comm_times)}")
-        print(f"First Seen  : {min(comm_times).isoformat()}")
-        print(f"Last Seen   : {max(comm_times).isoformat()}")
+    cmd_seen = summary['command_details'].get(query)
+    comm_seen = summary['comm_details'].get(query)
+
+    if cmd_seen:
+        header = f"\n=== Details for Command (EXECVE): '{query}' ==="
+        seen = cmd_seen
+    elif comm_seen:
+        header = f"\n=== Details for Process (comm=): '{query}' ==="
+        seen = comm_seen
     else:
         print(f"No data found for: '{query}'")
+        return
+    occurrences, first_seen, last_seen = seen
+    sys.stdout.write(f"{header}\n"
+                     f"Occurrences : {occurrences}\n"
+                     f"First Seen  : {first_seen.isoformat()}\n"
+                     f"Last Seen   : {last_seen.isoformat()}\n")
 
 def main():
     parser = argparse.ArgumentParser(description="Audit log analyzer using ausearch")
@@ -133,6 +360,12 @@ def main():
     parser.add_argument("--start", help="Start time (e.g. '2024-05-21 00:00:00')")
     parser.add_argument("--end", help="End time (e.g. '2024-05-21 23:59:59')")
     parser.add_argument("--details", help="Show detailed stats for a command or comm name")
+    parser.add_argument("--direct", action="store_true",
+                        help="With --start, scan audit.log directly instead of running ausearch "
+                             "(falls back to ausearch for compressed logs or non-ISO times)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep ausearch output in ~/.cache/sospy and reuse it on later runs "
+                             "(only for absolute --start/--end times)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose output")
     parser.add_argument("-d", "--debug", action="store_true", help="Enable debug output")
     args = parser.parse_args()
@@ -151,9 +384,29 @@ def main():
         if args.details:
             print(f"Detail view for: {args.details}")
 
+    blocks = None
+    if args.direct and args.start and is_plain_audit_log(audit_log):
+        try:
+            start_ts = parse_time_arg(args.start)
+            end_ts = parse_time_arg(args.end) if args.end else None
+            blocks = iter_audit_log_blocks(audit_log, start_ts, end_ts)
+            if args.debug:
+                print(f"[DEBUG] Scanning {audit_log} directly from {start_ts} to {end_ts}")
+        except ValueError:
+            if args.verbose:
+                print("Start/end time is not ISO formatted; using ausearch")
+
     try:
-        output = run_ausearch(audit_log, args.start, args.end, debug=args.debug)
-        summary = parse_ausearch_output(output)
+        if blocks is None:
+            cache_file = ausearch_cache_path(audit_log, args.start, args.end) if args.cache else None
+            if cache_file and os.path.isfile(cache_file):
+                if args.debug:
+                    print(f"[DEBUG] Using cached ausearch output: {cache_file}")
+                blocks = iter_cached_blocks(cache_file)
+            else:
+                blocks = iter_ausearch_blocks(audit_log, args.start, args.end, debug=args.debug,
+                                              cache_file=cache_file)
+        summary = parse_ausearch_output(blocks, track_details=bool(args.details))
         print_summary(summary)
         if args.details:
             show_command_details(summary, args.details)
@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 import re
-from collections import defaultdict
+from functools import lru_cache
+from heapq import nlargest
 
 # Regex patterns to detect timestamps and headers
 TIMESTAMP_REGEX = re.compile(r'^\d{1,2}:\d{2}:\d{2}\s+[APM]{2}\s+\S+\s+')
 VERBOSE_HEADER_REGEX = re.compile(r'^\s*#\s*Time\s+USER\s+')
+HEADER_REGEX = re.compile(r'^\s*(?:#|UID\b|USER\b|Time\b|Linux\b|$)')
+
+def parse_percent(value, _float=float):
+    """float() of a pidstat value, dropping the '%' suffix that --human adds."""
+    return _float(value[:-1]) if value[-1:] == '%' else _float(value)
 
 def detect_format(lines):
     """Detect whether the pidstat output is verbose or short based on headers."""
@@ -17,89 +24,110 @@ def detect_format(lines):
             return "short"
     return None  # Unrecognized format
 
-def parse_pidstat_line_short(line):
-    """Extract relevant CPU metrics from short-format pidstat output."""
-    try:
-        if not TIMESTAMP_REGEX.match(line):
-            return None  # Ignore non-timestamp lines
-
-        # Extract fields after the timestamp
-        fields = re.split(r'\s+', line.strip())[3:]  # Ignore timestamp parts
- 
-        if len(fields) < 8:
-            return None
-
-        user = fields[0]  # UID column
-        usr, system, wait, cpu = map(lambda x: float(x.strip('%')), (fields[2], fields[3], fields[5], fields[6]))
-        command = fields[-1]  # Last column is the command
-        return user, usr, system, wait, cpu, command.strip()
-
-    except (ValueError, IndexError):
-        print(line)
-        return None  # Ignore malformed lines
-
-def parse_pidstat_line_verbose(line):
-    """Extract relevant CPU metrics from verbose-format pidstat output."""
-    try:
-        fields = re.split(r'\s+', line.strip())
-        if len(fields) < 17:  # Ensure enough columns exist
-            return None
-
-        user = fields[1]  # USER column
-        usr, system, wait, cpu = map(lambda x: float(x.strip('%')), (fields[3], fields[4], fields[6], fields[7]))
-        command = fields[-1]  # Last column is the command
-
-        return user, usr, system, wait, cpu, command.strip()
-
-    except (ValueError, IndexError):
-        return None  # Ignore malformed lines
+# Column layout per format: (minimum field count, USER/UID, %usr, %system, %wait, %CPU).
+# Short-format indices include the three leading timestamp tokens.
+COLUMN_LAYOUTS = {
+    "short": (11, 3, 5, 6, 8, 9),
+    "verbose": (17, 1, 3, 4, 6, 7),
+}
 
-def calculate_usage(filename, group_by, sort_by, debug=False):
-    """Calculate and display CPU usage grouped by user or command."""
+def load_pidstat(filename, debug=False):
+    """Parse a pidstat file into columns: users, commands and usr/system/wait/cpu values."""
     try:
         with open(filename, 'r') as file:
-            lines = file.readlines()
+            lines = file.read().splitlines()
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")
-        return
-
-    usage_data = defaultdict(lambda: {'usr': 0.0, 'system': 0.0, 'wait': 0.0, 'cpu': 0.0, 'count': 0})
-    total_usr, total_system, total_wait, total_cpu, total_count = 0.0, 0.0, 0.0, 0.0, 0
+        return None
 
     format_type = detect_format(lines)
     if not format_type:
         print("Error: Unrecognized pidstat format.")
-        return
+        return None
+
+    min_fields, user_col, usr_col, system_col, wait_col, cpu_col = COLUMN_LAYOUTS[format_type]
+    short = format_type == "short"
+    columns = {'user': [], 'command': [], 'usr': [], 'system': [], 'wait': [], 'cpu': []}
+    users, commands = columns['user'], columns['command']
+    usrs, systems, waits, cpus = columns['usr'], columns['system'], columns['wait'], columns['cpu']
 
     for line in lines:
-        if "^Linux" in line or "Time" in line or "UID" in line or "USER" in line:  # Ignore headers
-            continue
-        parsed_data = parse_pidstat_line_short(line) if format_type == "short" else parse_pidstat_line_verbose(line)
-        if not parsed_data:
+        if HEADER_REGEX.match(line):  # Ignore headers and blank lines
             continue
+        if short and not TIMESTAMP_REGEX.match(line):
+            continue  # Ignore non-timestamp lines
 
-        user, usr, system, wait, cpu, command = parsed_data
-        key = user if group_by == "user" else command
+        fields = line.split()
+        if len(fields) < min_fields:
+            continue
+        try:
+            usr = parse_percent(fields[usr_col])
+            system = parse_percent(fields[system_col])
+            wait = parse_percent(fields[wait_col])
+            cpu = parse_percent(fields[cpu_col])
+        except ValueError:
+            continue  # Ignore malformed lines
+        user, command = fields[user_col], fields[-1]
 
         if debug:
             print(f"DEBUG: User={user}, usr={usr}, system={system}, wait={wait}, cpu={cpu}, Command={command}")
 
-        usage_data[key]['usr'] += usr
-        usage_data[key]['system'] += system
-        usage_data[key]['wait'] += wait
-        usage_data[key]['cpu'] += cpu
-        usage_data[key]['count'] += 1
+        users.append(user)
+        commands.append(command)
+        usrs.append(usr)
+        systems.append(system)
+        waits.append(wait)
+        cpus.append(cpu)
+
+    return columns
+
+@lru_cache(maxsize=4)
+def _load_cached(filename, mtime, debug):
+    return load_pidstat(filename, debug)
+
+def load(filename, debug=False):
+    """Parse a pidstat file once per (path, mtime) so every view shares the same columns."""
+    try:
+        mtime = os.path.getmtime(filename)
+    except OSError:
+        mtime = None
+    return _load_cached(filename, mtime, debug)
+
+def reduce_usage(keys, columns):
+    """Sum each metric column per distinct key, keeping first-seen key order."""
+    index = {}
+    codes = [index.setdefault(key, len(index)) for key in keys]
+
+    counts = [0] * len(index)
+    for code in codes:
+        counts[code] += 1
+
+    sums = {}
+    for metric in ('usr', 'system', 'wait', 'cpu'):
+        acc = [0.0] * len(index)
+        for code, value in zip(codes, columns[metric]):
+            acc[code] += value
+        sums[metric] = acc
+
+    return {key: {'usr': sums['usr'][i], 'system': sums['system'][i], 'wait': sums['wait'][i],
+                  'cpu': sums['cpu'][i], 'count': counts[i]}
+            for key, i in index.items()}
+
+def calculate_usage(filename, group_by, sort_by, debug=False):
+    """Calculate and display CPU usage grouped by user or command."""
+    columns = load(filename, debug)
+    if columns is None:
+        return
 
-        total_usr += usr
-        total_system += system
-        total_wait += wait
-        total_cpu += cpu
-        total_count += 1
+    usage_data = reduce_usage(columns[group_by], columns)
+    total_usr, total_system, total_wait, total_cpu = (sum(columns[m]) for m in ('usr', 'system', 'wait', 'cpu'))
+    total_count = len(columns['cpu'])
 
     # Sort results
-    sorted_usage = sorted(usage_data.items(), key=lambda x: x[1][sort_by], reverse=True)
     if group_by == "command":
-        sorted_usage = sorted_usage[:10]  # Limit to top 10 commands
+        sorted_usage = nlargest(10, usage_data.items(), key=lambda x: x[1][sort_by])  # Top 10 commands only
+    else:
+        sorted_usage = sorted(usage_data.items(), key=lambda x: x[1][sort_by], reverse=True)
 
     print(f"{'%usr':<10} {'%system':<10} {'%wait':<10} {'%CPU':<10} {'Count':<8} {'User/Command':<20}")
     print("-" * 70)
@@ -122,7 +150,7 @@ def main():
     parser.add_argument(
         "-u", "--user",
         action="store_true",
-        help="Show CPU usage per user, sorted by total %%CPU."
+        help="Show CPU usage per user, sorted by total %%CPU. Can be combined with --command."
     )
     parser.add_argument(
         "-c", "--command",
@@ -142,8 +170,11 @@ def main():
     )
     args = parser.parse_args()
 
-    group_by = "user" if args.user else "command" if args.command else "user"
-    calculate_usage(args.filename, group_by, args.sort, args.debug)
+    views = [view for view, wanted in (("user", args.user), ("command", args.command)) if wanted] or ["user"]
+    for i, group_by in enumerate(views):
+        if i:
+            print()
+        calculate_usage(args.filename, group_by, args.sort, args.debug)
 
 if __name__ == "__main__":
     main()
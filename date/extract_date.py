@@ -1,55 +1,128 @@
 #!/usr/bin/env python3
 
-import dateutil.parser
+import argparse
 import sys
-from dateutil.tz import gettz
-
-# Timezone mappings
-tzinfos = {
-    "UTC": gettz("UTC"),
-    "EDT": gettz("America/New_York"),
-    "EST": gettz("America/New_York"),
-    "CDT": gettz("America/Chicago"),
-    "CST": gettz("America/Chicago"),
-    "MDT": gettz("America/Denver"),
-    "MST": gettz("America/Denver"),
-    "PDT": gettz("America/Los_Angeles"),
-    "PST": gettz("America/Los_Angeles"),
-    "GMT": gettz("GMT"),
-    "BST": gettz("Europe/London"),
-    "CET": gettz("Europe/Paris"),
-    "EET": gettz("Europe/Helsinki"),
-    "CEST": gettz("Europe/Berlin"),
-    "EEST": gettz("Europe/Helsinki"),
-    "IST": gettz("Asia/Kolkata"),
-    "JST": gettz("Asia/Tokyo"),
-    "WIB": gettz("Asia/Jakarta"),
-    "IDT": gettz("Asia/Jerusalem"),
-    "AEST": gettz("Australia/Sydney"),
-    "AEDT": gettz("Australia/Sydney"),
-    "ACST": gettz("Australia/Adelaide"),
-    "AKST": gettz("America/Anchorage"),
-    "AST": gettz("America/Halifax"),
-    "AWST": gettz("Australia/Perth"),
-    "HKT": gettz("Asia/Hong_Kong"),
-    "HST": gettz("Pacific/Honolulu"),
-    "KST": gettz("Asia/Seoul"),
-    "MSK": gettz("Europe/Moscow"),
-    "NZST": gettz("Pacific/Auckland"),
-    "PKT": gettz("Asia/Karachi"),
-    "SGT": gettz("Asia/Singapore"),
-    "WAT": gettz("Africa/Lagos"),
-    "WET": gettz("Europe/Lisbon")
+from datetime import datetime
+from functools import lru_cache
+
+# Timezone abbreviations; zone files are only opened for the abbreviation actually seen
+TZ_NAMES = {
+    "UTC": "UTC",
+    "EDT": "America/New_York",
+    "EST": "America/New_York",
+    "CDT": "America/Chicago",
+    "CST": "America/Chicago",
+    "MDT": "America/Denver",
+    "MST": "America/Denver",
+    "PDT": "America/Los_Angeles",
+    "PST": "America/Los_Angeles",
+    "GMT": "GMT",
+    "BST": "Europe/London",
+    "CET": "Europe/Paris",
+    "EET": "Europe/Helsinki",
+    "CEST": "Europe/Berlin",
+    "EEST": "Europe/Helsinki",
+    "IST": "Asia/Kolkata",
+    "JST": "Asia/Tokyo",
+    "WIB": "Asia/Jakarta",
+    "IDT": "Asia/Jerusalem",
+    "AEST": "Australia/Sydney",
+    "AEDT": "Australia/Sydney",
+    "ACST": "Australia/Adelaide",
+    "AKST": "America/Anchorage",
+    "AST": "America/Halifax",
+    "AWST": "Australia/Perth",
+    "HKT": "Asia/Hong_Kong",
+    "HST": "Pacific/Honolulu",
+    "KST": "Asia/Seoul",
+    "MSK": "Europe/Moscow",
+    "NZST": "Pacific/Auckland",
+    "PKT": "Asia/Karachi",
+    "SGT": "Asia/Singapore",
+    "WAT": "Africa/Lagos",
+    "WET": "Europe/Lisbon"
 }
 
-# Read input and extract date
-date_str = sys.stdin.read().strip()
-if "Local time:" in date_str:
-    date_str = date_str.split("Local time:")[-1].strip()  # Extract actual date part
-
-try:
-    parsed_date = dateutil.parser.parse(date_str, fuzzy=True, tzinfos=tzinfos)
-    print(parsed_date.strftime("%d"))  # Print the day of the month
-except Exception as e:
-    print(f"Error parsing date: {e}", file=sys.stderr)
-    sys.exit(1)
+@lru_cache(maxsize=None)
+def tzinfos(name, offset):
+    """dateutil tzinfos callback: resolve an abbreviation via gettz on first use."""
+    from dateutil.tz import gettz
+    zone = TZ_NAMES.get(name)
+    return gettz(zone) if zone else None
+
+# Shapes seen in sosreports (date, timedatectl, ISO logs) once any zone token is dropped
+FAST_FORMATS = (
+    "%a %b %d %H:%M:%S %Y",
+    "%a %Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+# Yearless syslog-style stamps get a fixed leap year appended, since strptime warns on
+# formats without a year; only the day is used, and a leap year keeps Feb 29 valid
+YEARLESS_FORMAT = "%a %b %d %H:%M:%S %Y"
+YEARLESS_FILL = " 2000"
+
+def fast_day(date_str):
+    """Return the day of month for common date shapes, or None to fall back to dateutil."""
+    try:
+        return datetime.fromisoformat(date_str).day
+    except ValueError:
+        pass
+    text = " ".join(part for part in date_str.split() if part not in TZ_NAMES)
+    for fmt in FAST_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).day
+        except ValueError:
+            pass
+    try:
+        return datetime.strptime(text + YEARLESS_FILL, YEARLESS_FORMAT).day
+    except ValueError:
+        return None
+
+def parse_day(date_str):
+    """Day of month from a free-form date string."""
+    day = fast_day(date_str)
+    if day is None:
+        # dateutil is only imported when the fast paths miss
+        import dateutil.parser
+        day = dateutil.parser.parse(date_str, fuzzy=True, tzinfos=tzinfos).day
+    return day
+
+def extract_day(date_str):
+    """Day of month (two digits) from date/timedatectl style text."""
+    if "Local time:" in date_str:
+        date_str = date_str.split("Local time:")[-1].strip()  # Extract actual date part
+    return f"{parse_day(date_str):02d}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the day of month of a date read from stdin.")
+    parser.add_argument("-l", "--lines", action="store_true",
+                        help="Treat every stdin line as a separate date and print one day per line, "
+                             "flushing after each (keeps one process alive for a whole pipeline)")
+    args = parser.parse_args()
+
+    if not args.lines:
+        # Read input and extract date
+        try:
+            print(extract_day(sys.stdin.read().strip()))  # Print the day of the month
+        except Exception as e:
+            print(f"Error parsing date: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    # e.g. coproc ED { extract_date.py --lines; }
+    #      echo "$d" >&"${ED[1]}"; read -r day <&"${ED[0]}"
+    status = 0
+    for line in sys.stdin:
+        try:
+            day = extract_day(line.strip())
+        except Exception as e:
+            print(f"Error parsing date: {e}", file=sys.stderr)
+            day = ""  # Keep one output line per input line
+            status = 1
+        sys.stdout.write(day + "\n")
+        sys.stdout.flush()
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
@@ -2,25 +2,29 @@
 
 import sys
 
-# Check if an argument is provided
-if len(sys.argv) != 2:
-    print("Usage: ./convert_timestamp.py <timestamp_in_seconds>")
-    sys.exit(1)
+def split_seconds(timestamp):
+    """Split a number of seconds into (days, hours, minutes, seconds)."""
+    days, rem = divmod(timestamp, 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, seconds = divmod(rem, 60)
+    return days, hours, minutes, seconds
 
-# Get the timestamp from the argument (as a string) and convert it to an integer
-try:
-    timestamp = int(sys.argv[1])
-except ValueError:
-    print("Error: The argument must be an integer representing seconds.")
-    sys.exit(1)
+def main():
+    # Check if an argument is provided
+    if len(sys.argv) != 2:
+        print("Usage: ./convert_timestamp.py <timestamp_in_seconds>")
+        sys.exit(1)
 
-# Convert to days, hours, minutes, and seconds
-days = timestamp // (24 * 3600)
-timestamp %= (24 * 3600)
-hours = timestamp // 3600
-timestamp %= 3600
-minutes = timestamp // 60
-seconds = timestamp % 60
+    # Get the timestamp from the argument (as a string) and convert it to an integer
+    try:
+        timestamp = int(sys.argv[1])
+    except ValueError:
+        print("Error: The argument must be an integer representing seconds.")
+        sys.exit(1)
 
-# Display the result
-print(f"{days} days, {hours} hours, {minutes} minutes, {seconds} seconds")
+    # Display the result
+    days, hours, minutes, seconds = split_seconds(timestamp)
+    print(f"{days} days, {hours} hours, {minutes} minutes, {seconds} seconds")
+
+if __name__ == "__main__":
+    main()
@@ -10,78 +10,163 @@ import argparse
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 DECODECODE_PATH = os.path.join(SCRIPT_DIR, "decodecode")
 
+# decodecode only handles one Code: line per run, so a single shell loops over all of them.
+# Each run's stdout is followed by "\n<separator> <exit status>\n" and its stderr by "\n<separator>\n".
+BATCH_SEPARATOR = "===decodecode-batch-end==="
+BATCH_SCRIPT = r'''
+while IFS= read -r line; do
+    printf '%s\n' "$line" | "$0"
+    printf '\n%s %d\n' "$1" "$?"
+    printf '\n%s\n' "$1" >&2
+done
+'''
+
+RIP_RE = re.compile(r'\[\s*\d+\.\d+\]\s+RIP:\s+(\S+):(.+)')
+CODE_RE = re.compile(r'(\[\s*\d+\.\d+\])\s+Code:\s+.*')
+TIMESTAMP_PREFIX_RE = re.compile(r'^\[\s*\d+\.\d+\]\s+')
+MEM_OPERAND_RE = re.compile(r'\((%[a-z0-9]+)(?:,[^)]*)?\)')
+REGISTER_RE = re.compile(r'%([a-z0-9]+)')
+HEX_CHARS = frozenset("0123456789abcdefABCDEFxX")
+# decodecode output: the marker line before the second disassembly, and the trapping instruction line
+EXTRA_MARKER_RE = re.compile(r'^[^\S\n]*Code starting with the faulting instruction[^\n]*(?:\n|$)', re.M)
+TRAP_LINE_RE = re.compile(r'^[^\n]*<-- trapping instruction[^\n]*', re.M)
+# Lines kept per block for the register lookup, starting with the Code: line itself
+CONTEXT_LINES = 20
+
 def extract_code_blocks(filename):
     blocks = []
     current_rip = None
-
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-
-    for i, line in enumerate(lines):
-        rip_match = re.search(r'\[\s*\d+\.\d+\]\s+RIP:\s+(\S+):(.+)', line)
-        if rip_match:
-            segment = rip_match.group(1)
-            location = rip_match.group(2).strip()
-            current_rip = f"{segment}:{location}"
-
-        code_match = re.search(r'(\[\s*\d+\.\d+\])\s+Code:\s+.*', line)
-        if code_match:
-            timestamp = code_match.group(1)
-            code_line = line.strip()
-            blocks.append((timestamp, current_rip, code_line, i, lines))  # include line index + full log
+    pending = []  # Context windows of recent blocks that are still filling up
+
+    # Stream the log; only the CONTEXT_LINES lines from each Code: line on are kept
+    with open(filename, 'r', errors='replace') as f:
+        for line in f:
+            if pending:
+                for context in pending:
+                    context.append(line)
+                pending = [context for context in pending if len(context) < CONTEXT_LINES]
+
+            rip_match = RIP_RE.search(line)
+            if rip_match:
+                segment = rip_match.group(1)
+                location = rip_match.group(2).strip()
+                current_rip = f"{segment}:{location}"
+
+            code_match = CODE_RE.search(line)
+            if code_match:
+                timestamp = code_match.group(1)
+                code_line = line.strip()
+                context = [line]
+                blocks.append((timestamp, current_rip, code_line, context))
+                pending.append(context)
     return blocks
 
-def run_decodecode(code_line, debug=False):
-    code_line = re.sub(r'^\[\s*\d+\.\d+\]\s+', '', code_line)
+def normalize_code_line(code_line):
+    """Strip the timestamp prefix; returns None if what is left is not a Code: line."""
+    code_line = TIMESTAMP_PREFIX_RE.sub('', code_line)
     if not code_line.startswith("Code:"):
-        return f"[ERROR] Invalid code line: {code_line}"
+        return None
+    return code_line.strip()
+
+def decode_code_lines(code_lines, debug=False):
+    """Decode every distinct Code: line with one shell process; returns {code_line: output}."""
+    code_lines = list(dict.fromkeys(code_lines))  # Repeated oopses reuse the output
+    if not code_lines:
+        return {}
 
     env = os.environ.copy()
     env["AFLAGS"] = "--64"
 
     result = subprocess.run(
-        [DECODECODE_PATH],
-        input=f"{code_line}\n",
+        ["bash", "-c", BATCH_SCRIPT, DECODECODE_PATH, BATCH_SEPARATOR],
+        input="".join(f"{code_line}\n" for code_line in code_lines),
         capture_output=True,
         text=True,
         env=env
     )
 
-    if result.returncode != 0 and debug:
-        return (
-            f"[WARNING] decodecode exited with {result.returncode} (possibly expected)\n"
-            f"Input line: {code_line}\n"
-            f"STDOUT:\n{result.stdout}\n"
-            f"STDERR:\n{result.stderr}"
-        )
+    # stdout splits into [out1, "rc1\nout2", ..., "rcN\n"], stderr into [err1, ..., errN, ""]
+    stdout_parts = result.stdout.split(f"\n{BATCH_SEPARATOR} ")
+    stderr_parts = result.stderr.split(f"\n{BATCH_SEPARATOR}\n")
+    decoded = {}
+    stdout = stdout_parts[0]
+    for i, code_line in enumerate(code_lines):
+        if i + 1 < len(stdout_parts):
+            returncode, _, next_stdout = stdout_parts[i + 1].partition("\n")
+        else:  # The shell stopped before reaching this line
+            returncode, next_stdout = "1", ""
+        stderr = stderr_parts[i] if i < len(stderr_parts) else ""
+
+        if returncode != "0" and debug:
+            decoded[code_line] = (
+                f"[WARNING] decodecode exited with {returncode} (possibly expected)\n"
+                f"Input line: {code_line}\n"
+                f"STDOUT:\n{stdout}\n"
+                f"STDERR:\n{stderr}"
+            )
+        else:
+            # Always return full stdout, even if empty
+            decoded[code_line] = stdout
+        stdout = next_stdout
 
-    # Always return full stdout, even if empty
-    return result.stdout
+    return decoded
 
 def extract_trap_register(disasm_output):
     """
     Parses the disassembly output to find the trapping instruction
     and extracts the register used in a memory address (e.g., (%rax))
     """
-    for line in disasm_output.splitlines():
-        if '<-- trapping instruction' in line:
-            # Try to extract something like (%rax) or (%rdx,%rcx,8)
-            mem_match = re.search(r'\((%[a-z0-9]+)(?:,[^)]*)?\)', line)
-            if mem_match:
-                return mem_match.group(1).upper().lstrip('%')  # e.g. RAX
-            # Fallback: pick first register
-            reg_match = re.search(r'%([a-z0-9]+)', line)
-            if reg_match:
-                return reg_match.group(1).upper()
+    trap_match = TRAP_LINE_RE.search(disasm_output)
+    if trap_match:
+        line = trap_match.group(0)
+        # Try to extract something like (%rax) or (%rdx,%rcx,8)
+        mem_match = MEM_OPERAND_RE.search(line)
+        if mem_match:
+            return mem_match.group(1).upper().lstrip('%')  # e.g. RAX
+        # Fallback: pick first register
+        reg_match = REGISTER_RE.search(line)
+        if reg_match:
+            return reg_match.group(1).upper()
+    return None
+
+def split_disassembly(disasm_output):
+    """Split decodecode output at the 'Code starting with the faulting instruction' marker.
+
+    Returns (main, extra) text without the final newline; extra is empty if there is no marker.
+    """
+    marker = EXTRA_MARKER_RE.search(disasm_output)
+    if not marker:
+        return _chop_newline(disasm_output), ""
+    extra = EXTRA_MARKER_RE.sub('', disasm_output[marker.end():])  # Drop any repeated marker lines
+    return _chop_newline(disasm_output[:marker.start()]), _chop_newline(extra)
+
+def _chop_newline(text):
+    return text[:-1] if text.endswith('\n') else text
+
+def register_value_in_line(needle, line):
+    """Hand-parse 'NAME: <hex>' from line; needle is 'NAME:'. Returns the hex text or None."""
+    idx = line.find(needle)
+    while idx != -1:
+        # Word boundary before the name, so RAX does not match ORIG_RAX
+        if idx == 0 or not (line[idx - 1].isalnum() or line[idx - 1] == '_'):
+            j = idx + len(needle)
+            while j < len(line) and line[j].isspace():
+                j += 1
+            k = j
+            while k < len(line) and line[k] in HEX_CHARS:
+                k += 1
+            if k > j:
+                return line[j:k]
+        idx = line.find(needle, idx + 1)
     return None
 
-def find_register_value(register_name, log_lines, start_index):
-    reg_pattern = re.compile(rf'\b{register_name}:\s*([0-9a-fA-Fx]+)')
+def find_register_value(register_name, context_lines):
+    needle = f"{register_name}:"
     # Look forward a few lines after code line
-    for i in range(start_index, min(len(log_lines), start_index + 20)):
-        match = reg_pattern.search(log_lines[i])
-        if match:
-            return match.group(1)
+    for line in context_lines:
+        value = register_value_in_line(needle, line)
+        if value:
+            return value
     return None
 
 def main():
@@ -102,56 +187,53 @@ def main():
         print("No 'Code:' lines found in the file.")
         return
 
-    for idx, (timestamp, rip_info, code_line, line_no, full_log) in enumerate(code_blocks, start=1):
-        print(f"\n=== Decoding Code Block #{idx} ===")
-        print(f"⏱️  Timestamp: {timestamp}")
-        print(f"📍 RIP: {rip_info or '[unknown]'}")
+    code_lines = [normalize_code_line(block[2]) for block in code_blocks]
+    decoded = decode_code_lines([line for line in code_lines if line], debug=args.debug)
+
+    out = []  # Output is collected and written once
+    for idx, (timestamp, rip_info, code_line, context_lines) in enumerate(code_blocks, start=1):
+        out.append(f"\n=== Decoding Code Block #{idx} ===\n")
+        out.append(f"⏱️  Timestamp: {timestamp}\n")
+        out.append(f"📍 RIP: {rip_info or '[unknown]'}\n")
 
         if rip_info and rip_info.startswith("0010"):
-            print("🧠 Context: [KERNEL MODE]")
+            out.append("🧠 Context: [KERNEL MODE]\n")
         elif rip_info and rip_info.startswith("0033"):
-            print("🧍 Context: [USER MODE]")
+            out.append("🧍 Context: [USER MODE]\n")
         else:
-            print("❓ Context: [UNKNOWN]")
+            out.append("❓ Context: [UNKNOWN]\n")
 
-        disasm_output = run_decodecode(code_line, debug=args.debug)
+        normalized = code_lines[idx - 1]
+        if normalized:
+            disasm_output = decoded[normalized]
+        else:
+            disasm_output = f"[ERROR] Invalid code line: {TIMESTAMP_PREFIX_RE.sub('', code_line)}"
 
         if not disasm_output.strip():
-            print(f"[⚠️] No disassembly output from decodecode for block #{idx}.")
+            out.append(f"[⚠️] No disassembly output from decodecode for block #{idx}.\n")
             continue
 
-        # Split decodecode output
-        lines = disasm_output.splitlines()
-        main_disasm = []
-        extra_disasm = []
-        in_extra = False
-
-        for line in lines:
-            if line.strip().startswith("Code starting with the faulting instruction"):
-                in_extra = True
-                continue
-            if in_extra:
-                extra_disasm.append(line)
-            else:
-                main_disasm.append(line)
+        main_disasm, extra_disasm = split_disassembly(disasm_output)
 
         # Always show the main part
-        print("\n".join(main_disasm))
+        out.append(f"{main_disasm}\n")
 
         # Show the extra disasm only in verbose mode
         if args.verbose and extra_disasm:
-            print("\nCode starting with the faulting instruction")
-            print("===========================================")
-            print("\n".join(extra_disasm))
+            out.append("\nCode starting with the faulting instruction\n")
+            out.append("===========================================\n")
+            out.append(f"{extra_disasm}\n")
 
         # Extract and display the register involved in the fault
         trap_reg = extract_trap_register(disasm_output)
         if trap_reg:
-            reg_val = find_register_value(trap_reg, full_log, line_no)
+            reg_val = find_register_value(trap_reg, context_lines)
             if reg_val:
-                print(f"\n💥 Trapping instruction used {trap_reg} = {reg_val}")
+                out.append(f"\n💥 Trapping instruction used {trap_reg} = {reg_val}\n")
             else:
-                print(f"\n💥 Trapping instruction used {trap_reg}, but value not found nearby.")
+                out.append(f"\n💥 Trapping instruction used {trap_reg}, but value not found nearby.\n")
+
+    sys.stdout.write("".join(out))
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,34 @@
 #!/usr/bin/env python3
 
+import os
 import re
+import sys
+import mmap
 import argparse
+from bisect import bisect_right
+from itertools import compress
+
+# An iomem line: (whole line, indentation, start hex, end hex)
+# The indentation group gives each line's nesting depth during the scan, without stripping a copy
+IOMEM_LINE_RE = re.compile(rb'^(([ \t]*)([0-9a-fA-F]+)-([0-9a-fA-F]+)[^\n]*)', re.M)
+# Same, plus a fifth field that is non-empty when the line mentions "reserved" in any case
+IOMEM_RESERVED_LINE_RE = re.compile(
+    rb'^(([ \t]*)([0-9a-fA-F]+)-([0-9a-fA-F]+)(?:(?=[^\n]*((?i:reserved)))|)[^\n]*)', re.M)
+
+def scan_iomem(file_path, pattern=IOMEM_LINE_RE):
+    """Return raw (line, indent, start_hex, end_hex) bytes for every address-range line.
+
+    Hex fields and line text are left undecoded so callers only convert
+    the entries they actually use. pattern selects which fields are captured.
+    """
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return pattern.findall(file.read())  # procfs reports size 0 and cannot be mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return pattern.findall(mm)
+
+def decode_line(line):
+    return line.decode(errors='replace').rstrip()
 
 # Function to parse and display statistics
 def show_statistics(file_path):
@@ -12,27 +39,24 @@ def show_statistics(file_path):
     crash_kernel_size = 0
     system_ram_ceiling = 0
 
-    with open(file_path, 'r') as file:
-        for line in file:
-            # Match memory range
-            match = re.search(r'([0-9a-fA-F]+)-([0-9a-fA-F]+)', line)
-            if match:
-                start = int(match.group(1), 16)
-                end = int(match.group(2), 16)
-                size = end - start + 1
-
-                if "system ram" in line.lower():
-                    system_ram_size += size
-                    system_ram_ceiling = max(system_ram_ceiling, end)
-                elif "reserved" in line.lower():
-                    reserved_size += size
-                elif "crash kernel" in line.lower():
-                    crash_kernel_size += size
-                else:
-                    if end <= system_ram_ceiling:
-                        device_regions_below += size
-                    else:
-                        device_regions_above += size
+    for line, _, start_hex, end_hex in scan_iomem(file_path):
+        start = int(start_hex, 16)
+        end = int(end_hex, 16)
+        size = end - start + 1
+        line = line.lower()
+
+        if b"system ram" in line:
+            system_ram_size += size
+            system_ram_ceiling = max(system_ram_ceiling, end)
+        elif b"reserved" in line:
+            reserved_size += size
+        elif b"crash kernel" in line:
+            crash_kernel_size += size
+        else:
+            if end <= system_ram_ceiling:
+                device_regions_below += size
+            else:
+                device_regions_above += size
 
     # Display statistics
     print(f"System RAM: {system_ram_size / (2**20):.2f} MB")
@@ -44,116 +68,81 @@ def show_statistics(file_path):
 # Function to parse and display memory ranges
 def parse_iomem(file_path, reserved_only):
 
-    hierarchy = []  # Stack to keep track of the hierarchy
+    out = []  # Output is collected and written once
     total_reserved_size = 0  # Variable to track total reserved memory
-    size = None  # Declare size here to avoid UnboundLocalError
-
-    # Read all lines of the file at once
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-
-    # Iterate over the lines
-    for i, line in enumerate(lines):
-        # Use regex to find the memory range (e.g., '00000000-0009ffff')
-        match = re.search(r'([0-9a-fA-F]+)-([0-9a-fA-F]+)', line)
-        if match:
-            start = int(match.group(1), 16)  # Start address (hex to int)
-            end = int(match.group(2), 16)  # End address (hex to int)
-            size = (end - start + 1)  # Calculate the size
-
-        # Track hierarchy (Reset hierarchy if the line is top-level)
-        current_indent = len(line) - len(line.lstrip())
-
-        # Continue normal processing for non-top-level option
-        if current_indent == 0:  # Top-level entry, no indent
-            hierarchy = [line]  # Start a new hierarchy
-        else:  # Indented lines, part of the current hierarchy
-            hierarchy.append(line)
-
-        # Check if the line contains 'Reserved' (case-insensitive) and print it along with hierarchy
-        if "reserved" in line.lower():
-            total_reserved_size += size  # Add reserved size to total
-
-            # Print the entire hierarchy leading to this Reserved entry
-            for j, parent in enumerate(hierarchy[:-1]):  # Avoid printing the Reserved line itself twice
-                match_parent = re.search(r'([0-9a-fA-F]+)-([0-9a-fA-F]+)', parent)
-                if match_parent:
-                    # Check if the previous or next line contains "Reserved" or indentation change
-                    parent_indent = len(parent) - len(parent.lstrip()) if j > 0 else 0
-                    next_parent_indent = len(hierarchy[j + 1]) - len(hierarchy[j + 1].lstrip()) if j + 1 < len(hierarchy) else 0
-                    if (parent_indent == 0) or ( "reserved" in lines[i - 1].lower() or "reserved" in lines[i + 1].lower()) or (parent_indent != next_parent_indent ):
-                        # Print only if there's an indentation change or 'Reserved' around
-                        start_parent = int(match_parent.group(1), 16)
-                        end_parent = int(match_parent.group(2), 16)
-                        size_parent = (end_parent - start_parent + 1)
-                        print(f"{parent.rstrip()}\t {size_parent} ({size_parent / (2**20):.2f} MiB)")
-
-            # Print the current Reserved line
-            print(f"{line.rstrip()}\t {size} ({size / (2**20):.2f} MiB)")
-
-            # Check if text line is a child (if it exists and is indented)
-            if i + 1 < len(lines):
-                next_line = lines[i + 1]
-                next_indent = len(next_line) - len(next_line.lstrip())
-                if next_indent > current_indent:  # Indented line, child of Reserved
-                    match_child = re.search(r'([0-9a-fA-F]+)-([0-9a-fA-F]+)', next_line)
-                    if match_child:
-                        start_child = int(match_child.group(1), 16)
-                        end_child = int(match_child.group(2), 16)
-                        size_child = (end_child - start_child + 1)
-                        if "reserved" in next_line.lower():
-                            total_reserved_size += size_child  # Add child reserved size to total
-                        print(f"{next_line.rstrip()}\t {size_child} ({size_child / (2**20):.2f} MiB)")
-
-        # Exclude lines that don't contain 'Reserved' (case-insensitive) and do not cause an indentation change
-        elif "reserved" not in line.lower():
-            prev_indent = len(lines[i - 1]) - len(lines[i - 1].lstrip()) if i > 0 else 0
-            next_indent = len(lines[i + 1]) - len(lines[i + 1].lstrip()) if i + 1 < len(lines) else 0
-
-            # Skip lines where indentation does not change before or after
-            if current_indent == prev_indent == next_indent:
-                continue  # Skip this line if it's not changing indentation and doesn't contain 'Reserved'
+
+    # One pass builds parallel per-entry arrays; the sweep below only indexes them
+    indents, sizes, lines, is_reserved = [], [], [], []
+    for line, indent, start_hex, end_hex, reserved in scan_iomem(file_path, IOMEM_RESERVED_LINE_RE):
+        indents.append(len(indent))  # Depth straight from the captured leading whitespace
+        sizes.append(int(end_hex, 16) - int(start_hex, 16) + 1)
+        lines.append(line)  # Decoded only if printed
+        is_reserved.append(bool(reserved))  # Matched by the scan, no lowercased copy
+    count = len(lines)
+
+    # The hierarchy of an entry is every entry from the last top-level one up to it,
+    # so only Reserved entries are visited and their hierarchy is found by bisecting
+    top_level = [i for i, indent in enumerate(indents) if indent == 0]
+
+    # Print Reserved entries (case-insensitive) along with their hierarchy
+    for i in compress(range(count), is_reserved):
+        current_indent = indents[i]
+        k = bisect_right(top_level, i)
+        first = top_level[k - 1] if k else 0  # Entries before any top-level line form one hierarchy
+        total_reserved_size += sizes[i]  # Add reserved size to total
+
+        near_reserved = (i > 0 and is_reserved[i - 1]) or (i + 1 < count and is_reserved[i + 1])
+
+        # Print the entire hierarchy leading to this Reserved entry
+        for parent in range(first, i):  # Avoid printing the Reserved line itself twice
+            # Check if the previous or next line contains "Reserved" or indentation change
+            parent_indent = indents[parent] if parent > first else 0
+            next_parent_indent = indents[parent + 1]
+            if (parent_indent == 0) or near_reserved or (parent_indent != next_parent_indent):
+                # Print only if there's an indentation change or 'Reserved' around
+                out.append(f"{decode_line(lines[parent])}\t {sizes[parent]} ({sizes[parent] / (2**20):.2f} MiB)\n")
+
+        # Print the current Reserved line
+        out.append(f"{decode_line(lines[i])}\t {sizes[i]} ({sizes[i] / (2**20):.2f} MiB)\n")
+
+        # Check if text line is a child (if it exists and is indented)
+        if i + 1 < count and indents[i + 1] > current_indent:  # Indented line, child of Reserved
+            if is_reserved[i + 1]:
+                total_reserved_size += sizes[i + 1]  # Add child reserved size to total
+            out.append(f"{decode_line(lines[i + 1])}\t {sizes[i + 1]} ({sizes[i + 1] / (2**20):.2f} MiB)\n")
 
     # Print the total reserved memory size at the end
-    print(f"\nTotal reserved memory: {total_reserved_size} bytes ({total_reserved_size / (2**30):.2f} GiB)")
+    out.append(f"\nTotal reserved memory: {total_reserved_size} bytes ({total_reserved_size / (2**30):.2f} GiB)\n")
+    sys.stdout.write("".join(out))
 
 # Function to handle other options
 def parse_full_iomem(file_path, top_level_only, search_keyword=None):
     total_size = 0  # Variable to keep track of total memory size
-    size = None  # Declare size here to avoid UnboundLocalError
-
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-
-    # Convert the keyword to lowercase for case-insensitive matching
-    search_keyword = search_keyword.lower() if search_keyword else None
+    out = []  # Output is collected and written once
 
-    # Iterate over the lines
-    for i, line in enumerate(lines):
-        # Track hierarchy (Reset hierarchy if the line is top-level)
-        current_indent = len(line) - len(line.lstrip())
+    entries = scan_iomem(file_path)
 
-        # If the -t option is provided, only show top-level lines (no indentation)
-        if top_level_only and current_indent != 0:
-            continue
+    # Filters are applied once up front so the output loop carries no per-line checks
+    # If the -t option is provided, only show top-level lines (no indentation)
+    if top_level_only:
+        entries = [entry for entry in entries if not entry[1]]
 
-        # Handle the -s option (show only lines matching the keyword)
-        if search_keyword and search_keyword not in line.lower():
-            continue
+    # Handle the -s option (show only lines matching the keyword, case-insensitive)
+    if search_keyword:
+        search_keyword = search_keyword.lower()
+        entries = [entry for entry in entries if search_keyword in decode_line(entry[0]).lower()]
 
-        # Use regex to find the memory range (e.g., '00000000-0009ffff')
-        match = re.search(r'([0-9a-fA-F]+)-([0-9a-fA-F]+)', line)
-        if match:
-            start = int(match.group(1), 16)  # Start address (hex to int)
-            end = int(match.group(2), 16)  # End address (hex to int)
-            size = (end - start + 1)  # Calculate the size
-            total_size += size  # Add to total size
+    for line, _, start_hex, end_hex in entries:
+        # Hex fields are only converted for lines that survive the filters
+        size = (int(end_hex, 16) - int(start_hex, 16) + 1)  # Calculate the size
+        total_size += size  # Add to total size
 
-            # Print the current line with calculated size
-            print(f"{line.rstrip()}\t {size} ({size / (2**20):.2f} MiB)")
+        # Print the current line with calculated size
+        out.append(f"{decode_line(line)}\t {size} ({size / (2**20):.2f} MiB)\n")
 
     # Print the total memory size at the end
-    print(f"\nTotal memory: {total_size} bytes ({total_size / (2**30):.2f} GiB)")
+    out.append(f"\nTotal memory: {total_size} bytes ({total_size / (2**30):.2f} GiB)\n")
+    sys.stdout.write("".join(out))
 
 # Main function to handle command-line arguments
 def main():
@@ -1,39 +1,52 @@
 #!/usr/bin/env python3
 
+import os
 import sys
+import mmap
 import argparse
 from pathlib import Path
-import re
-from collections import defaultdict
+
+# Summary lines always included in the output; lsmem prints them unindented
+SUMMARY_PREFIXES = ('Memory block size:', 'Total online memory', 'Total offline memory')
+
+# Size suffixes as printed by lsmem, in GB
+SIZE_UNITS_GB = {"K": 1 / (1024**2), "M": 1 / 1024, "G": 1, "T": 1024}
 
 # Helper function to convert memory size to GB
 def convert_to_gb(size_str):
-    size_units = {"K": 1 / (1024**2), "M": 1 / 1024, "G": 1, "T": 1024}
-    match = re.match(r"(\d+)([KMGT])", size_str)
-    if match:
-        size, unit = match.groups()
-        return int(size) * size_units[unit]
+    factor = SIZE_UNITS_GB.get(size_str[-1:])
+    number = size_str[:-1]
+    if factor is not None and number.isdigit():
+        return int(number) * factor
     return 0  # Return 0 if parsing fails
 
+def read_lines(filename):
+    """Return the file's lines, reading regular files through a read-only mmap."""
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return file.read().decode().splitlines(True)  # procfs-style files cannot be mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [line.decode() for line in iter(mm.readline, b"")]
+
 def parse_file(filename, show_online=False, show_offline=False, show_per_node=False):
     try:
-        with open(filename, 'r') as file:
-            lines = file.readlines()
+        lines = read_lines(filename)
 
         # Skip header line
         lines = lines[1:]
 
-        # Always include these summary lines
-        keywords = ['Memory block size:', 'Total online memory', 'Total offline memory']
         filtered_lines = []
-        keyword_lines = [line for line in lines if any(keyword in line for keyword in keywords)]
+        keyword_lines = []
 
-        # Per-node memory tracking
-        node_memory = defaultdict(lambda: {"online": 0, "offline": 0})
+        # Per-node memory tracking, indexed by node id
+        node_online = []
+        node_offline = []
+        node_seen = []
 
         for line in lines:
-            if any(keyword in line for keyword in keywords):
-                continue  # Skip summary lines for now
+            if line.startswith(SUMMARY_PREFIXES):
+                keyword_lines.append(line)  # Emitted after the block listing
+                continue
             
             parts = line.split()
             if len(parts) < 6:
@@ -46,8 +59,17 @@ def parse_file(filename, show_online=False, show_offline=False, show_per_node=Fa
             if not node.isdigit():
                 continue  # Skip invalid node entries
 
-            size_gb = convert_to_gb(size_str)
-            node_memory[int(node)][state] += size_gb
+            node_id = int(node)
+            if node_id >= len(node_seen):
+                grow = node_id + 1 - len(node_seen)
+                node_online.extend([0] * grow)
+                node_offline.extend([0] * grow)
+                node_seen.extend([False] * grow)
+            node_seen[node_id] = True
+            if state == "online":
+                node_online[node_id] += convert_to_gb(size_str)
+            elif state == "offline":
+                node_offline[node_id] += convert_to_gb(size_str)
 
             if show_online and state == "online":
                 filtered_lines.append(line)
@@ -59,8 +81,9 @@ def parse_file(filename, show_online=False, show_offline=False, show_per_node=Fa
         # Append per-node memory summary
         if show_per_node:
             filtered_lines.append("\nPer-Node Memory Summary:")
-            for node, sizes in sorted(node_memory.items()):
-                filtered_lines.append(f"Node {node}: Online: {sizes['online']:.2f} GB, Offline: {sizes['offline']:.2f} GB")
+            for node_id, seen in enumerate(node_seen):
+                if seen:
+                    filtered_lines.append(f"Node {node_id}: Online: {node_online[node_id]:.2f} GB, Offline: {node_offline[node_id]:.2f} GB")
 
         return filtered_lines + keyword_lines
 
@@ -95,8 +118,7 @@ def main():
     lines = parse_file(filename, show_online=args.online, show_offline=args.offline, show_per_node=args.node_summary)
 
     # Print the results
-    for line in lines:
-        print(line.strip())
+    sys.stdout.write("".join(f"{line.strip()}\n" for line in lines))
 
 if __name__ == "__main__":
     main()
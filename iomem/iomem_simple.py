@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 
+import os
 import re
+import mmap
+import array
 import argparse
 import sys
 
@@ -15,29 +18,20 @@ args = parser.parse_args()
 system_ram_total = 0
 device_regions_total = 0
 crash_kernel_total = 0
-reserved_ranges = []  # Store all reserved ranges as tuples of (start, end)
+reserved_starts = array.array('Q')  # Reserved ranges as parallel unsigned 64-bit start/end arrays
+reserved_ends = array.array('Q')
+
+# Match memory range and description, allowing for leading whitespace (indented lines)
+ENTRY_RE = re.compile(rb'^[ \t]*([0-9a-fA-F]+)-([0-9a-fA-F]+) : (.+)', re.M)
 
 # Try to open and read the file
 try:
-    with open(args.filename, 'r') as f:
-        for line in f:
-            # Match memory range and description, allowing for leading whitespace (indented lines)
-            match = re.match(r'\s*([0-9a-fA-F]+)-([0-9a-fA-F]+) : (.+)', line)
-            if match:
-                start_addr = int(match.group(1), 16)
-                end_addr = int(match.group(2), 16)
-                size = end_addr - start_addr + 1  # Calculate size in bytes
-
-                # Categorize based on description, capturing indented "Reserved" as well
-                description = match.group(3).strip().lower()
-                if "system ram" in description:
-                    system_ram_total += size
-                elif "reserved" in description:
-                    reserved_ranges.append((start_addr, end_addr))
-                elif "crash kernel" in description:
-                    crash_kernel_total += size
-                else:
-                    device_regions_total += size
+    with open(args.filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            entries = ENTRY_RE.findall(f.read())  # procfs reports size 0 and cannot be mapped
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                entries = ENTRY_RE.findall(mm)  # Parse the whole file in one regex pass
 except FileNotFoundError:
     print(f"Error: File '{args.filename}' not found.")
     sys.exit(1)
@@ -45,25 +39,46 @@ except PermissionError:
     print(f"Error: Permission denied to read '{args.filename}'.")
     sys.exit(1)
 
+for start_hex, end_hex, description in entries:
+    start_addr = int(start_hex, 16)
+    end_addr = int(end_hex, 16)
+
+    # Categorize based on description, capturing indented "Reserved" as well
+    description = description.lower()
+    if b"system ram" in description:
+        system_ram_total += end_addr - start_addr + 1
+    elif b"reserved" in description:
+        reserved_starts.append(start_addr)
+        reserved_ends.append(end_addr)
+    elif b"crash kernel" in description:
+        crash_kernel_total += end_addr - start_addr + 1
+    else:
+        device_regions_total += end_addr - start_addr + 1
+
 # Function to consolidate overlapping and adjacent Reserved ranges
-def consolidate_ranges(ranges):
-    # Sort ranges by starting address
-    ranges.sort()
-    consolidated = []
+def consolidate_ranges(starts, ends):
+    """Merge ranges given as parallel start/end arrays; returns merged (starts, ends) arrays."""
+    # Visit ranges by starting address without building (start, end) tuples
+    order = sorted(range(len(starts)), key=starts.__getitem__)
+    merged_starts = array.array('Q')
+    merged_ends = array.array('Q')
 
-    for start, end in ranges:
-        if consolidated and start <= consolidated[-1][1] + 1:
-            # Merge overlapping or adjacent ranges
-            consolidated[-1] = (consolidated[-1][0], max(consolidated[-1][1], end))
+    for i in order:
+        start, end = starts[i], ends[i]
+        if merged_ends and start <= merged_ends[-1] + 1:
+            # Merge overlapping or adjacent ranges in place
+            if end > merged_ends[-1]:
+                merged_ends[-1] = end
         else:
             # Add new range to consolidated list
-            consolidated.append((start, end))
+            merged_starts.append(start)
+            merged_ends.append(end)
 
-    return consolidated
+    return merged_starts, merged_ends
 
 # Consolidate Reserved ranges and calculate total
-consolidated_reserved_ranges = consolidate_ranges(reserved_ranges)
-reserved_total = sum(end - start + 1 for start, end in consolidated_reserved_ranges)
+merged_starts, merged_ends = consolidate_ranges(reserved_starts, reserved_ends)
+reserved_total = sum(merged_ends) - sum(merged_starts) + len(merged_starts)
 
 # Convert bytes to megabytes
 system_ram_mb = system_ram_total / (1024 * 1024)
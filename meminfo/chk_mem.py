@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 
 import sys
-import re
 import os
-import argparse
+import mmap
+from types import SimpleNamespace
 
 DEFAULT_MEMINFO = "proc/meminfo"
 
@@ -14,11 +14,22 @@ FIELDS = [
     "PageTables", "Percpu",
     "HugePages_Total", "Hugepagesize", "Hugetlb"
 ]
-
-def scale_value(kb, unit):
-    if unit == "K": return kb
-    if unit == "M": return kb / 1024
-    if unit == "G": return kb / (1024 * 1024)
+# Fields summed as accounted memory, keyed by show_anonpages: with AnonPages available it
+# replaces Active(anon)/Inactive(anon), otherwise those two are used instead
+NEVER_ACCOUNTED = frozenset({"MemTotal", "Unevictable", "Hugetlb", "HugePages_Total", "Hugepagesize"})
+EXCLUDED_FIELDS = {
+    True: NEVER_ACCOUNTED | {"Active(anon)", "Inactive(anon)"},
+    False: NEVER_ACCOUNTED | {"AnonPages"},
+}
+ACCOUNTED_FIELDS = {
+    show_anonpages: tuple(f for f in FIELDS if f not in excluded)
+    for show_anonpages, excluded in EXCLUDED_FIELDS.items()
+}
+# Wanted line keys as bytes mapped to their field names: one lookup both filters and names a line
+FIELD_NAMES = {field.encode(): field for field in FIELDS}
+
+# KiB per display unit; values stay in KiB until they are printed
+UNIT_DIVISORS = {"K": 1, "M": 1024, "G": 1024 * 1024}
 
 def size_str_to_kb(size_str):
     if not size_str:
@@ -35,23 +46,40 @@ def size_str_to_kb(size_str):
     return None
 
 def parse_meminfo(path, verbose=False):
-    if not os.path.isfile(path):
+    # Unbuffered: the file is either mapped or slurped with a single read(), never read line by line
+    try:
+        f = open(path, 'rb', buffering=0)  # No separate stat(); open() reports a missing file
+    except (FileNotFoundError, IsADirectoryError):
         print(f"Error: File not found: {path}")
         sys.exit(1)
 
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return parse_meminfo_lines(f.read().splitlines(), verbose)  # live /proc cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return parse_meminfo_lines(iter(mm.readline, b""), verbose)
+
+def parse_meminfo_lines(lines, verbose=False):
     meminfo = {}
-    with open(path, 'r') as f:
-        for line in f:
-            parts = line.split()
-            if len(parts) < 2:
-                continue
-            key = parts[0].rstrip(':')
-            if key in FIELDS:
-                try:
-                    meminfo[key] = int(parts[1])
-                except ValueError:
-                    if verbose:
-                        print(f"Skipping line due to non-integer value: {line.strip()}")
+    wanted = len(FIELD_NAMES)
+    for line in lines:
+        key, _, rest = line.partition(b':')
+        field = FIELD_NAMES.get(key)
+        if field is None:
+            continue
+        values = rest.split(None, 1)  # Only the number is needed, not the unit
+        if not values:
+            continue
+        try:
+            meminfo[field] = int(values[0])
+        except ValueError:
+            if verbose:
+                print(f"Skipping line due to non-integer value: {line.strip().decode()}")
+            continue
+        # Every field found: the rest (DirectMap*, etc.) has nothing we use. Optional fields
+        # such as Hugetlb sit near the end, so incomplete files are still read through.
+        if len(meminfo) == wanted:
+            break
     return meminfo
 
 def compute_anonpages(meminfo):
@@ -64,28 +92,38 @@ def compute_anonpages(meminfo):
     sys.exit(1)
 
 def parse_cmdline_hugepages():
-    hugepages = None
-    hugepagesz = None
-    default_hugepagesz = None
-
     cmdline_path = "proc/cmdline"
-    if not os.path.isfile(cmdline_path):
+    try:
+        f = open(cmdline_path, "rb", buffering=0)
+    except (FileNotFoundError, IsADirectoryError):
         return None, None
 
-    with open(cmdline_path, "r") as f:
-        cmdline = f.read()
-
-    match = re.search(r"hugepages=(\d+)", cmdline)
-    if match:
-        hugepages = int(match.group(1))
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return parse_cmdline(f.read())  # live /proc cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return parse_cmdline(mm)
 
-    match = re.search(r"default_hugepagesz=(\S+)", cmdline)
-    if match:
-        default_hugepagesz = match.group(1)
+def parse_cmdline(cmdline):
+    """Return (hugepages, size string) from the raw bytes of a kernel command line."""
+    hugepages = None
+    hugepagesz = None
+    default_hugepagesz = None
 
-    match = re.search(r"hugepagesz=(\S+)", cmdline)
-    if match:
-        hugepagesz = match.group(1)
+    # One pass over the whitespace-separated key=value tokens; the first of each key wins
+    for token in cmdline[:].split():
+        key, sep, value = token.partition(b"=")
+        if not sep:
+            continue
+        if key == b"hugepages":
+            if hugepages is None and value.isdigit():
+                hugepages = int(value)
+        elif key == b"hugepagesz":
+            if hugepagesz is None and value:
+                hugepagesz = value.decode(errors="replace")
+        elif key == b"default_hugepagesz":
+            if default_hugepagesz is None and value:
+                default_hugepagesz = value.decode(errors="replace")
 
     # Prefer explicit size
     size = hugepagesz or default_hugepagesz
@@ -117,17 +155,28 @@ def compute_hugepages(meminfo, debug=False):
 
     # Priority 3: Fallback to sysfs (only if size known)
     if size_kb:
-        sys_path = os.path.join(root, f"sys/kernel/mm/hugepages/hugepages-{size_kb}kB/nr_hugepages")
-        if os.path.isfile(sys_path):
+        # Relative to the sosreport root, like proc/meminfo and proc/cmdline
+        sys_path = f"sys/kernel/mm/hugepages/hugepages-{size_kb}kB/nr_hugepages"
+        try:
+            fd = os.open(sys_path, os.O_RDONLY)
+        except FileNotFoundError:
+            fd = None
+        except OSError as e:
+            # Unreadable (e.g. a root-only extracted sosreport); fall back to 0 like other read errors
+            print(f"Error reading {sys_path}: {e}")
+            fd = None
+        if fd is not None:
             try:
-                with open(sys_path) as f:
-                    count = int(f.read().strip())
-                    meminfo["HugePages"] = count * size_kb
-                    if debug:
-                        print(f"DEBUG: Fallback sysfs HugePages: {count} × {size_kb} KiB = {meminfo['HugePages']} KiB")
-                    return
+                # A single pread() of the small attribute; no file object layers
+                count = int(os.pread(fd, 64, 0))
+                meminfo["HugePages"] = count * size_kb
+                if debug:
+                    print(f"DEBUG: Fallback sysfs HugePages: {count} × {size_kb} KiB = {meminfo['HugePages']} KiB")
+                return
             except Exception as e:
                 print(f"Error reading {sys_path}: {e}")
+            finally:
+                os.close(fd)
 
     # If all fail
     print("Warning: HugePages usage could not be determined.")
@@ -139,48 +188,54 @@ def calculate_unaccounted(meminfo, show_anonpages):
         print("Error: MemTotal not found.")
         sys.exit(1)
 
-    accounted = []
-    for field in FIELDS:
-        if field in ("MemTotal", "Unevictable", "Hugetlb"):
-            continue
-        if field == "AnonPages" and not show_anonpages:
-            continue
-        if field in ("Active(anon)", "Inactive(anon)") and show_anonpages:
-            continue
-        if field in ("HugePages_Total", "Hugepagesize"):
-            continue
-        if field in meminfo:
-            accounted.append(field)
+    accounted = [field for field in ACCOUNTED_FIELDS[show_anonpages] if field in meminfo]
     if "HugePages" in meminfo:
         accounted.append("HugePages")
 
-    accounted_sum = sum(meminfo[field] for field in accounted)
+    accounted_sum = sum(map(meminfo.__getitem__, accounted))
     return total, accounted_sum, total - accounted_sum, accounted
 
 def print_report(meminfo, total, accounted_fields, accounted_sum, unaccounted, verbose, show_anonpages, unit):
     unit_label = {"K": "KiB", "M": "MiB", "G": "GiB"}.get(unit, "MiB")
+    divisor = UNIT_DIVISORS[unit]  # Chosen once for the whole report
+    row_fmt = "{:<20} {:>20.2f}".format  # Parsed once, reused for every row
+
+    # Every value is scaled exactly once and shared by the formula and the table
+    scaled = {field: meminfo[field] / divisor for field in accounted_fields}
+    scaled_total = total / divisor
+    scaled_unaccounted = unaccounted / divisor
+    out = []  # Report lines, written with a single call at the end
 
     if verbose:
         # Header line for formula
         formula_fields = " - ".join(accounted_fields)
-        values_line = " - ".join(f"{scale_value(meminfo[field], unit):.2f}" for field in accounted_fields)
-        print("Formula used for calculation:")
-        print(f"  Unaccounted Memory = MemTotal - {formula_fields}")
-        print(f"  {scale_value(unaccounted, unit):.2f} = {scale_value(total, unit):.2f} - {values_line}\n")
+        values_line = " - ".join(f"{scaled[field]:.2f}" for field in accounted_fields)
+        out.append("Formula used for calculation:")
+        out.append(f"  Unaccounted Memory = MemTotal - {formula_fields}")
+        out.append(f"  {scaled_unaccounted:.2f} = {scaled_total:.2f} - {values_line}\n")
 
         # Final summary
-        print(f"{'Unaccounted:':<20} {scale_value(unaccounted, unit):>20.2f} ({unit_label})\n")
+        out.append(f"{row_fmt('Unaccounted:', scaled_unaccounted)} ({unit_label})\n")
 
     header = f"{'Field':<20} {'Size (' + unit_label + ')':>20}"
-    print(header)
-    print("=" * len(header))
-    print(f"{'MemTotal:':<20} {scale_value(total, unit):>20.2f}")
+    out.append(header)
+    out.append("=" * len(header))
+    out.append(row_fmt("MemTotal:", scaled_total))
     for key in accounted_fields:
-        print(f"{key:<20} {scale_value(meminfo[key], unit):>20.2f}")
-    print("=" * len(header))
-    print(f"{'Unaccounted:':<20} {scale_value(unaccounted, unit):>20.2f}\n")
+        out.append(row_fmt(key, scaled[key]))
+    out.append("=" * len(header))
+    out.append(f"{row_fmt('Unaccounted:', scaled_unaccounted)}\n")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 def parse_args():
+    argv = sys.argv[1:]
+    # The common invocations (no options, or just a unit) skip building the argparse parser
+    if not argv or (len(argv) == 1 and argv[0] in ("-K", "-M", "-G")):
+        return SimpleNamespace(filename=DEFAULT_MEMINFO, verbose=False, debug=False,
+                               unaccounted=True, unit=argv[0][1] if argv else "G")
+
+    import argparse  # Only needed for the less common invocations
     parser = argparse.ArgumentParser(
         description="Calculate unaccounted memory from proc/meminfo or a custom file."
     )
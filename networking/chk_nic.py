@@ -2,9 +2,14 @@
 
 import os
 import re
+import sys
+import mmap
 import subprocess
 import glob
 import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 STANDARD_BUFFER_SIZE = 2  #kB
 JUMBO_BUFFER_SIZE = 16    #kB
@@ -12,63 +17,54 @@ SOS_ETHTOOL_PATH = "sos_commands/networking/ethtool_-g_*"
 SYS_CLASS_NET = "sys/class/net"
 PROC_INTERRUPTS = "proc/interrupts"
 IP_ADDR_DETAIL_PATH = "sos_commands/networking/ip_-d_address"
+NMCLI_DIR = "sos_commands/networkmanager"
 
 unit_label = {"K": "KiB", "M": "MiB", "G": "GiB"}
-
-def scale_value(kb, unit):
-    if unit == "K": return kb
-    if unit == "M": return kb / 1024
-    if unit == "G": return kb / (1024 * 1024)
-
+UNIT_DIVISORS = {"K": 1, "M": 1024, "G": 1024 * 1024}  # KiB per display unit
+
+WORD_RE = re.compile(rb"\w+")
+# Maps every non-word byte to a space, so translate() + split() yields a line's words without a regex
+WORD_SPLIT_TABLE = bytes(c if chr(c).isascii() and (chr(c).isalnum() or c == 0x5F) else 0x20 for c in range(256))
+# Ring size lines of ethtool -g: "RX:", "RX Jumbo:" or "TX:" followed by a number ("n/a" never matches)
+ETHTOOL_RING_RE = re.compile(rb"^\s*(RX|RX Jumbo|TX):\s+(\d+)")
+# One match per relevant line of ip -d address: an interface header ("8: eno1: <...> mtu 1500 ...",
+# groups 1-2) or, failing that, a line with a "maxmtu" token (group 3)
+MTU_LINE_RE = re.compile(
+    rb"^[^\S\n]*(?:\d+:[^\S\n]+([^:@\s]+):[^\n]*\bmtu[^\S\n]+(\d+)"
+    rb"|[^\n]*?(?<!\S)maxmtu[^\S\n]+(\S+))",
+    re.M,
+)
+# Cheap prefix test so most ethtool lines never reach the regex
+RING_PREFIXES = (b"RX", b"TX")
+
+@lru_cache(maxsize=None)
 def _build_mtu_cache():
     mtu_info = {}
     if not os.path.exists(IP_ADDR_DETAIL_PATH):
         return mtu_info
 
-    current_iface = None
-    current_data = {}
-
-    with open(IP_ADDR_DETAIL_PATH, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Match the interface line: e.g. "8: eno12419np2: <...> mtu 1500 ..."
-            iface_match = re.match(r"\d+:\s+([^:@\s]+):.*\bmtu\s+(\d+)", line)
-            if iface_match:
-                # Save the previous interface's data
-                if current_iface and current_data:
-                    mtu_info[current_iface] = current_data
-
-                current_iface = iface_match.group(1)
-                mtu_value = int(iface_match.group(2))
-                current_data = {"mtu": mtu_value}
+    with open(IP_ADDR_DETAIL_PATH, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            matches = MTU_LINE_RE.findall(f.read())
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                matches = MTU_LINE_RE.findall(mm)
+
+    current_data = None
+    for iface, mtu, maxmtu in matches:
+        if iface:
+            # Start of a new interface block; a repeated name replaces the earlier block
+            current_data = mtu_info[iface.decode()] = {"mtu": int(mtu)}
+        elif current_data is not None:
+            try:
+                current_data["maxmtu"] = int(maxmtu)
+            except ValueError:
                 continue
 
-            # Match lines that contain "maxmtu"
-            if "maxmtu" in line and current_iface:
-                tokens = line.split()
-                try:
-                    if "maxmtu" in tokens:
-                        maxmtu_idx = tokens.index("maxmtu")
-                        maxmtu = int(tokens[maxmtu_idx + 1])
-                        current_data["maxmtu"] = maxmtu
-                except (ValueError, IndexError):
-                    continue
-
-    # Save the last one
-    if current_iface and current_data:
-        mtu_info[current_iface] = current_data
-
     return mtu_info
 
 def get_mtu(interface, verbose=False):
-    cache = getattr(get_mtu, "_cache", None)
-    if cache is None:
-        cache = get_mtu._cache = _build_mtu_cache()
-
-    mtu = cache.get(interface, {}).get("mtu")
+    mtu = _build_mtu_cache().get(interface, {}).get("mtu")
     if mtu:
         return mtu
 
@@ -77,11 +73,7 @@ def get_mtu(interface, verbose=False):
     return 1500
 
 def get_max_mtu(interface, verbose=False):
-    cache = getattr(get_mtu, "_cache", None)
-    if cache is None:
-        cache = get_mtu._cache = _build_mtu_cache()
-
-    maxmtu = cache.get(interface, {}).get("maxmtu")
+    maxmtu = _build_mtu_cache().get(interface, {}).get("maxmtu")
     if maxmtu:
         return maxmtu
 
@@ -95,24 +87,58 @@ def get_max_mtu(interface, verbose=False):
 
     return 9000
 
-def get_interrupt_count(interface):
+def _build_irq_cache():
+    """Read proc/interrupts once; return (per-word line counts, raw file contents).
+
+    A name made only of word characters has a word-boundary match on a line exactly
+    when it is one of the line's words, so those lookups need no per-interface scan.
+    Only the trailing chip/action columns are tokenized: the IRQ label and the
+    per-CPU counter columns (one per CPU in the header) never hold interface names.
+    """
+    counts = Counter()
     try:
-        with open(PROC_INTERRUPTS, 'r') as f:
-            lines = f.readlines()
-        matches = [line for line in lines if re.search(rf'\b{re.escape(interface)}\b', line)]
-        return len(matches)
-    except Exception:
-        return 0
+        with open(PROC_INTERRUPTS, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                data = f.read()  # live /proc cannot be mapped
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    data = mm[:]  # bytes kept for the fallback scan; the mapping is released here
+    except OSError:
+        return counts, b""
+
+    lines = iter(data.splitlines())
+    header = next(lines, b"")
+    leading_fields = len(header.split()) + 1  # IRQ label plus one counter per CPU
+    for line in lines:
+        fields = line.split(None, leading_fields)
+        if len(fields) > leading_fields:
+            # Each line counts once per word
+            counts.update(set(fields[-1].translate(WORD_SPLIT_TABLE).split()))
+    return counts, data
+
+def get_interrupt_count(interface):
+    cache = getattr(get_interrupt_count, "_cache", None)
+    if cache is None:
+        cache = get_interrupt_count._cache = _build_irq_cache()
+    counts, data = cache
+
+    name = interface.encode()
+    if WORD_RE.fullmatch(name):
+        return counts[name]
+
+    # Names such as bond0.100 or br-ex span several words; count matching lines in one
+    # scan of the buffer (the trailing .* consumes the rest of the line)
+    pattern = re.compile(rb"^.*?\b" + re.escape(name) + rb"\b.*", re.M)
+    return sum(1 for _ in pattern.finditer(data))
 
 def print_nic_memory_table(nic_data, verbose=False, unit="M"):
     unit_label = {"K": "KiB", "M": "MiB", "G": "GiB"}
     label = unit_label.get(unit.upper(), "MiB")
+    divisor = UNIT_DIVISORS[unit]
 
-    header_fmt = "{:<15} {:>5} {:>7} {:>7} {:>7} {:>14} {:>10}"
-    row_fmt =    "{:<15} {:>5} {:>7} {:>7} {:>7} {:>14,} {:>10.2f}"
-
-    print(header_fmt.format("Interface", "MTU", "Queues", "RX", "TX", "BufSize(KiB)", label))
-    print("-" * 80)
+    out = []  # Table lines, written with a single call at the end
+    out.append(f"{'Interface':<15} {'MTU':>5} {'Queues':>7} {'RX':>7} {'TX':>7} {'BufSize(KiB)':>14} {label:>10}")
+    out.append("-" * 80)
 
     total_kb = 0
     verbose_lines = []
@@ -121,9 +147,9 @@ def print_nic_memory_table(nic_data, verbose=False, unit="M"):
         buffer_count = (rx + tx) * queues
         iface_kb = buffer_count * buffer_size
         total_kb += iface_kb
-        converted = scale_value(iface_kb, unit)
+        converted = iface_kb / divisor
 
-        print(row_fmt.format(iface, mtu, queues, rx, tx, buffer_size, converted))
+        out.append(f"{iface:<15} {mtu:>5} {queues:>7} {rx:>7} {tx:>7} {buffer_size:>14,} {converted:>10.2f}")
 
         if verbose:
             formula = (f"{iface}: ({rx} + {tx}) * {queues} * {buffer_size} KiB = "
@@ -131,83 +157,75 @@ def print_nic_memory_table(nic_data, verbose=False, unit="M"):
                        f"({converted:.2f} {label})")
             verbose_lines.append(formula)
 
-    total_converted = scale_value(total_kb, unit)
-    print("-" * 80)
-    print(f"{'Total':<61}{total_converted:>10.2f} {label}")
+    total_converted = total_kb / divisor
+    out.append("-" * 80)
+    out.append(f"{'Total':<61}{total_converted:>10.2f} {label}")
 
     if verbose and verbose_lines:
-        print("\nVerbose calculations:")
-        for line in verbose_lines:
-            print(line)
+        out.append("\nVerbose calculations:")
+        out.extend(verbose_lines)
+
+    sys.stdout.write("\n".join(out) + "\n")
+
+def _iter_lines(path):
+    """Yield the lines of path as bytes, reading through a mapping of the file."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield from f  # empty files cannot be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter(mm.readline, b"")
 
 def parse_ethtool_file(filepath):
     iface = os.path.basename(filepath).replace("ethtool_-g_", "")
-    rx, rx_jumbo, tx = 0, 0, 0
-    with open(filepath, 'r') as f:
-        for line in f:
-            if "RX:" in line and "Mini" not in line:
-                rx = int(line.strip().split()[1])
-            elif "RX Jumbo" in line:
-                tokens = line.strip().split()
-                if len(tokens) > 2 and tokens[2].isdigit():
-                    rx_jumbo = int(tokens[2])
-            elif "TX:" in line:
-                tx = int(line.strip().split()[1])
-    return iface, rx, rx_jumbo, tx
-
-def calculate_total_memory(nic_info, verbose=False, unit="M"):
-    nic_data = []
-    for iface, (rx, rx_jumbo, tx) in nic_info.items():
-        mtu = get_mtu(iface, verbose)
-        queues = get_interrupt_count(iface)
-        if queues == 0:
+    ring = {b"RX": 0, b"RX Jumbo": 0, b"TX": 0}
+    in_current = False
+    for line in _iter_lines(filepath):
+        if not line.lstrip().startswith(RING_PREFIXES):
+            if line.startswith(b"Current hardware settings"):
+                in_current = True
             continue
-
-        buffer_size = JUMBO_BUFFER_SIZE if mtu > 1500 else STANDARD_BUFFER_SIZE
-        active_rx = rx_jumbo if mtu > 1500 else rx
-
-        nic_data.append((iface, mtu, queues, active_rx, tx, buffer_size))
-
-    print_nic_memory_table(nic_data, verbose, unit)
+        match = ETHTOOL_RING_RE.match(line)
+        if match:
+            ring[match.group(1)] = int(match.group(2))
+            # ethtool prints TX last in each block; nothing after the current block's TX matters
+            if in_current and match.group(1) == b"TX":
+                break
+    return iface, ring[b"RX"], ring[b"RX Jumbo"], ring[b"TX"]
 
 def parse_max_ethtool_file(filepath):
     iface = os.path.basename(filepath).replace("ethtool_-g_", "")
-    max_rx, max_rx_jumbo, max_tx = 0, 0, 0
+    ring = {b"RX": 0, b"RX Jumbo": 0, b"TX": 0}
     in_max_section = False
 
-    with open(filepath, 'r') as f:
-        for line in f:
-            if "Pre-set maximums" in line:
-                in_max_section = True
-                continue
-            elif in_max_section and (line.strip() == "" or "Current hardware settings" in line):
-                break
-            if in_max_section:
-                if "RX:" in line and "Mini" not in line:
-                    max_rx = int(line.strip().split()[1])
-                elif "RX Jumbo" in line:
-                    tokens = line.strip().split()
-                    if len(tokens) > 2 and tokens[2].isdigit():
-                        max_rx_jumbo = int(tokens[2])
-                elif "TX:" in line:
-                    max_tx = int(line.strip().split()[1])
-    return iface, max_rx, max_rx_jumbo, max_tx
-
-def calculate_max_memory(nic_info, verbose=False, unit="M"):
-    # No need to pre-build the map — we now use get_max_mtu() inline
-    nic_data = []
-    for iface, (rx, rx_jumbo, tx) in nic_info.items():
-        mtu = get_max_mtu(iface, verbose)
-        queues = get_interrupt_count(iface)
-        if queues == 0:
+    for line in _iter_lines(filepath):
+        if b"Pre-set maximums" in line:
+            in_max_section = True
             continue
-
-        buffer_size = JUMBO_BUFFER_SIZE if mtu > 1500 else STANDARD_BUFFER_SIZE
+        elif in_max_section and (line.strip() == b"" or b"Current hardware settings" in line):
+            break
+        if in_max_section and line.lstrip().startswith(RING_PREFIXES):
+            match = ETHTOOL_RING_RE.match(line)
+            if match:
+                ring[match.group(1)] = int(match.group(2))
+                if match.group(1) == b"TX":
+                    break  # TX is the last maximum ethtool prints
+    return iface, ring[b"RX"], ring[b"RX Jumbo"], ring[b"TX"]
+
+def _make_row(entry, max_mode=False, verbose=False):
+    """Turn one parsed ethtool entry into a table row, or None when it has no IRQs."""
+    iface, rx, rx_jumbo, tx = entry
+    mtu = get_max_mtu(iface, verbose) if max_mode else get_mtu(iface, verbose)
+    queues = get_interrupt_count(iface)
+    if queues == 0:
+        return None
+
+    buffer_size = JUMBO_BUFFER_SIZE if mtu > 1500 else STANDARD_BUFFER_SIZE
+    if max_mode:
         active_rx = rx_jumbo if mtu > 1500 and rx_jumbo > 0 else rx
-
-        nic_data.append((iface, mtu, queues, active_rx, tx, buffer_size))
-
-    print_nic_memory_table(nic_data, verbose, unit)
+    else:
+        active_rx = rx_jumbo if mtu > 1500 else rx
+    return (iface, mtu, queues, active_rx, tx, buffer_size)
 
 def print_debug_info(ethtool_files, interfaces):
     print("\n[Debug] Files referenced by the script:\n")
@@ -218,9 +236,11 @@ def print_debug_info(ethtool_files, interfaces):
     for f in ethtool_files:
         print(f"  [*] {f}")
 
+    # One directory listing instead of a stat per interface
+    present = set(os.listdir(NMCLI_DIR)) if os.path.isdir(NMCLI_DIR) else set()
     for iface in interfaces:
-        nmcli_file = f"sos_commands/networkmanager/nmcli_dev_show_{iface}"
-        if os.path.exists(nmcli_file):
+        nmcli_file = f"{NMCLI_DIR}/nmcli_dev_show_{iface}"
+        if f"nmcli_dev_show_{iface}" in present:
             print(f"  [*] {nmcli_file}")
         else:
             print(f"  [!] {nmcli_file} (missing)")
@@ -251,38 +271,23 @@ def main():
         print(f"No {SOS_ETHTOOL_PATH} files found")
         exit(1)
 
-    if args.max:
-        nic_info = {}
-        for f in ethtool_files:
-            iface, rx, rx_jumbo, tx = parse_max_ethtool_file(f)
-            if filter_pattern and filter_pattern not in iface:
-                continue
-            nic_info[iface] = (rx, rx_jumbo, tx)
-
-        if not nic_info:
-            print(f"No matching interfaces for filter: '{filter_pattern}'")
-            exit(1)
+    # The files are independent; read them concurrently, results keep glob order
+    parse = parse_max_ethtool_file if args.max else parse_ethtool_file
+    with ThreadPoolExecutor(max_workers=min(32, len(ethtool_files))) as pool:
+        parsed = list(pool.map(parse, ethtool_files))
 
-        if args.debug:
-            print_debug_info(ethtool_files, nic_info.keys())
-
-        calculate_max_memory(nic_info, verbose=args.verbose, unit=args.unit)
-    else:
-        nic_info = {}
-        for f in ethtool_files:
-            iface, rx, rx_jumbo, tx = parse_ethtool_file(f)
-            if filter_pattern and filter_pattern not in iface:
-                continue
-            nic_info[iface] = (rx, rx_jumbo, tx)
-
-        if not nic_info:
-            print(f"No matching interfaces for filter: '{filter_pattern}'")
-            exit(1)
+    if filter_pattern:
+        parsed = [entry for entry in parsed if filter_pattern in entry[0]]
+    if not parsed:
+        print(f"No matching interfaces for filter: '{filter_pattern}'")
+        exit(1)
 
-        if args.debug:
-            print_debug_info(ethtool_files, nic_info.keys())
+    if args.debug:
+        print_debug_info(ethtool_files, [entry[0] for entry in parsed])
 
-        calculate_total_memory(nic_info, verbose=args.verbose, unit=args.unit)
+    rows = (_make_row(entry, args.max, args.verbose) for entry in parsed)
+    nic_data = [row for row in rows if row is not None]
+    print_nic_memory_table(nic_data, args.verbose, args.unit)
 
 if __name__ == "__main__":
     main()
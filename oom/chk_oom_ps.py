@@ -1,56 +1,80 @@
 #!/usr/bin/env python3
 
+import os
 import re
 import sys
+import mmap
 import argparse
+from bisect import bisect_left
 from collections import defaultdict
-
-def scale_value(value, from_unit="P", to_unit="M", pagesize_kb=4):
-    if from_unit == 'P':
-        value_kb = value * pagesize_kb
-    elif from_unit == 'K':
-        value_kb = value
-    elif from_unit == 'M':
-        value_kb = value * 1024
-    elif from_unit == 'G':
-        value_kb = value * 1024 * 1024
-    else:
-        raise ValueError('Unsupported from_unit')
-
-    if to_unit == 'K':
-        return value_kb
-    elif to_unit == 'M':
-        return value_kb / 1024
-    elif to_unit == 'G':
-        return value_kb / (1024 * 1024)
-    elif to_unit == 'P':
-        return value_kb / pagesize_kb
-    else:
-        raise ValueError('Unsupported to_unit')
+from heapq import nlargest
+
+# Markers of the lines that open and close an OOM event
+EVENT_START_RE = re.compile(rb"invoked oom-killer")
+EVENT_END_RE = re.compile(rb"Out of memory: Kill(?:ed)? process")
+# Process table entry: pid, uid, tgid, total_vm, rss, pgtables_bytes, swapents, oom_score_adj
+# and name; only rss, swapents and name are captured. The leading "[" is a literal, so the regex
+# engine skips straight to candidate lines. Fields are separated by blanks only, which keeps a
+# match on one line, and the trailing [^\n]* skips the rest of it so at most one entry counts per line.
+USAGE_RE = re.compile(
+    rb"\[[ \t]*\d+][ \t]+\d+[ \t]+\d+[ \t]+\d+[ \t]+(\d+)[ \t]+\d+"
+    rb"[ \t]+(\d+)[ \t]+-?\d+[ \t]+(\S+)[^\n]*"
+)
+
+def _line_bounds(data, pattern):
+    """Returns (start, end) offsets of each distinct line containing pattern."""
+    bounds = []
+    end = -1
+    for m in pattern.finditer(data):
+        if m.start() <= end:
+            continue  # another hit on a line already recorded
+        start = data.rfind(b"\n", 0, m.start()) + 1
+        end = data.find(b"\n", m.end())
+        if end < 0:
+            end = len(data)
+        bounds.append((start, end))
+    return bounds
+
+def find_event_spans(data):
+    """
+    Locates OOM events in the raw log.
+    An event starts at an "invoked oom-killer" line and ends after the first
+    "Out of memory: Kill(ed) process" line, or just before the next event start.
+    Returns a list of (start_line, start_offset, end_offset).
+    """
+    starts = _line_bounds(data, EVENT_START_RE)
+    kills = _line_bounds(data, EVENT_END_RE)
+    kill_starts = [start for start, _ in kills]
+
+    spans = []
+    for i, (start, line_end) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(data)
+        k = bisect_left(kill_starts, start)
+        if k < len(kills) and kills[k][0] < end:
+            end = kills[k][1]
+        line = data[start:line_end].strip().decode('utf-8', errors='ignore')
+        spans.append((line, start, end))
+    return spans
 
 def parse_oom_log(file_path):
     """
-    Parses the OOM log file and extracts OOM events.
+    Parses the OOM log file and extracts the process table rows of each OOM event.
     Args:
         file_path (str): Path to the OOM log file.
     Returns:
-        defaultdict: A dictionary with OOM event start lines as keys and corresponding log lines as values.
+        defaultdict: A dictionary with OOM event start lines as keys and (rss, swapents, name) byte tuples as values.
     """
     oom_events = defaultdict(list)
-    current_event = None
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            for line in file:
-                # Detect the start of an OOM event
-                if "invoked oom-killer" in line:
-                    current_event = line.strip()
-                # Collect the relevant data within the OOM event
-                if current_event:
-                    oom_events[current_event].append(line.strip())
-                    if "Out of memory: Killed process" in line or \
-                       "Out of memory: Kill process" in line:
-                        current_event = None
+        with open(file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                data = file.read()  # empty or procfs-like files cannot be mapped
+            else:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            # Scan only inside each event, the regex engine walks the buffer in place
+            for event, start, end in find_event_spans(data):
+                oom_events[event].extend(USAGE_RE.findall(data, start, end))
     except FileNotFoundError:
         print(f"File not found: {file_path}")
         sys.exit(1)
@@ -62,23 +86,37 @@ def parse_oom_log(file_path):
 
 def extract_rss_and_swap_usage(oom_events):
     """
-    Extract RSS and swap usage from OOM event blocks.
-    Accepts a dict of {event_start_line: [log_lines]}.
-    Returns a list of (pid, name, rss_pages, swap_pages).
+    Aggregate RSS and swap usage per process name.
+    Accepts a dict of {event_start_line: [(rss, swapents, name)]}.
+    Returns {event_start_line: (names, rss, swap, count)}: a list of names and three
+    parallel list columns, in pages. Events without process rows are left out.
     """
-    usage_info = defaultdict(lambda: defaultdict(lambda: {'rss': 0, 'swap': 0, 'count': 0}))
-    # Pattern to correctly capture the PID, UID, TGID, total_vm, rss, pgtables_bytes, swapents, oom_score_adj, and name
-    usage_pattern = re.compile(
-        r'\[\s*(\d+)]\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(-?\d+)\s+([^\s]+)'
-    )
-
-    for event, lines in oom_events.items():
-        for line in lines:
-            if match := usage_pattern.search(line):
-                name = match.group(9)
-                usage_info[event][name]['rss'] += int(match.group(5))
-                usage_info[event][name]['swap'] += int(match.group(7))
-                usage_info[event][name]['count'] += 1
+    usage_info = {}
+
+    for event, rows in oom_events.items():
+        if not rows:
+            continue
+        names, rss_col, swap_col, count_col = [], [], [], []
+        index = {}  # decoded name -> column position
+        raw_index = {}  # raw name -> column position, so each distinct name is decoded once
+
+        for rss, swap, raw_name in rows:
+            i = raw_index.get(raw_name)
+            if i is None:
+                name = raw_name.decode('utf-8', errors='ignore')
+                i = index.get(name)
+                if i is None:
+                    i = index[name] = len(names)
+                    names.append(name)
+                    rss_col.append(0)
+                    swap_col.append(0)
+                    count_col.append(0)
+                raw_index[raw_name] = i
+            rss_col[i] += int(rss)
+            swap_col[i] += int(swap)
+            count_col[i] += 1
+
+        usage_info[event] = (names, rss_col, swap_col, count_col)
 
     return usage_info
 
@@ -86,36 +124,47 @@ def display_usage(event_usage, include_swap=False, unit="M", pagesize_kb=4):
     """
     Displays the RSS and optionally swap usage information in GB only.
     Args:
-        event_usage (defaultdict): RSS and swap usage data.
+        event_usage (dict): Per-event (names, rss, swap, count) columns in pages.
         include_swap (bool): Whether to display swap usage.
     """
 
     unit_label = {'P': 'Pages', 'K': 'KiB', 'M': 'MB', 'G': 'GB'}.get(unit, 'MB')
+    # Values are in pages; pages * pagesize_kb / divisor gives the display unit
+    divisor = {'P': pagesize_kb, 'K': 1, 'M': 1024, 'G': 1024 * 1024}[unit]
+
+    # The column headers do not change between events
+    if include_swap:
+        header = f"{'RSS (' + unit_label + ')':>12} {'Swap (' + unit_label + ')':>12} {'Count':>8} {'Name':<20}"
+    else:
+        header = f"{'RSS (' + unit_label + ')':>10} {'Count':>10} {'Name':<20}"
 
-    for event, usage in event_usage.items():
-        sorted_usage = sorted(usage.items(), key=lambda x: x[1]['rss'], reverse=True)
-        total_rss = scale_value(sum(data['rss'] for data in usage.values()), 'P', unit, pagesize_kb)
-        print(f"\nEvent: {event}")
+    out = []  # Report lines for every event, written with a single call at the end
+    for event, (names, rss_col, swap_col, count_col) in event_usage.items():
+        top = nlargest(10, range(len(names)), key=rss_col.__getitem__)  # Show only the top 10 items
+        total_rss = sum(rss_col) * pagesize_kb / divisor
+        out.append(f"\nEvent: {event}")
         if include_swap:
-            total_swap = scale_value(sum(data['swap'] for data in usage.values()), 'P', unit, pagesize_kb)
-            print(f"{'RSS (' + unit_label + ')':>12} {'Swap (' + unit_label + ')':>12} {'Count':>8} {'Name':<20}")
-        else:
-            print(f"{'RSS (' + unit_label + ')':>10} {'Count':>10} {'Name':<20}")
+            total_swap = sum(swap_col) * pagesize_kb / divisor
+        out.append(header)
 
-        for name, data in sorted_usage[:10]:  # Show only the top 10 items
-            rss = scale_value(data['rss'], 'P', unit, pagesize_kb)
-            count = data['count']
+        for i in top:
+            name = names[i]
+            rss = rss_col[i] * pagesize_kb / divisor
+            count = count_col[i]
             if include_swap:
-                swap = scale_value(data['swap'], 'P', unit, pagesize_kb)
-                print(f"{rss:>10.2f} {swap:>12.2f} {count:>10} {name:<20}")
+                swap = swap_col[i] * pagesize_kb / divisor
+                out.append(f"{rss:>10.2f} {swap:>12.2f} {count:>10} {name:<20}")
             else:
-                print(f"{rss:>10.2f} {count:>10} {name:<20}")
-        print('-' * 50)
+                out.append(f"{rss:>10.2f} {count:>10} {name:<20}")
+        out.append('-' * 50)
 
         if include_swap:
-            print(f"{total_rss:>10.2f} {total_swap:>12.2f} {'RSS Total':>20}")
+            out.append(f"{total_rss:>10.2f} {total_swap:>12.2f} {'RSS Total':>20}")
         else:
-            print(f"{total_rss:>10.2f} {'RSS Total':>20}")
+            out.append(f"{total_rss:>10.2f} {'RSS Total':>20}")
+
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
 
 def main():
     parser = argparse.ArgumentParser(description="Parse OOM log and display RSS and optional swap usage.")
@@ -1,100 +1,116 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import re
+import mmap
 import argparse
 
-from config import patterns, mem_info_pattern, oom_pattern
+from config import int_after_anchors, int_before_anchors, patterns, pattern_anchors, node_hugepages_pattern
 
-def scale_value(value, from_unit="P", to_unit="M", pagesize_kb=4):
+# Per-section helpers, compiled once instead of on every section
+KERNEL_TIMESTAMP_RE = re.compile(r'\[\d+\.\d+\]')
+
+# KiB per display unit; pages ("P") are shown in KiB
+UNIT_DIVISORS = {"K": 1, "M": 1024, "G": 1024 * 1024}
+
+# Fields subtracted from the total memory, in formula order, to get the unaccounted memory
+UNACCOUNTED_FIELDS = ('active_anon', 'inactive_anon', 'isolated_anon', 'pagecache', 'swapcache',
+                      'slab_reclaimable', 'slab_unreclaimable', 'pagetables', 'free', 'reserved',
+                      'bounce', 'free_cma')
+
+def iter_mem_events(file_path):
     """
-    Convert a memory value from pages or KB to the desired unit.
-    - from_unit: "P" or "K"
-    - to_unit: "K", "M", "G"
+    Maps the log file and yields one (timestamp, memory_info, hugepages_total_kb,
+    hugepages_used_kb) tuple per Mem-Info section. Sections are cut out of the raw
+    bytes one at a time; only the Mem-Info lines are decoded, as timestamps.
     """
-    kb = value * pagesize_kb if from_unit == "P" else value
-    if to_unit == "K":
-        return kb
-    elif to_unit == "M":
-        return kb / 1024
-    elif to_unit == "G":
-        return kb / (1024 * 1024)
-    return kb
-
-
-def parse_log_file(file_path):
-    """Reads the log file and returns its contents as a string."""
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            return file.read()
+        file = open(file_path, 'rb')
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
 
-    return mem_info_list
-
-def extract_memory_info(log_data):
-    """Extracts memory information and timestamps from different log patterns."""
-
-    # Check if there is a match for Mem-Info in the log
-    if not re.search(mem_info_pattern, log_data):
-        print("No OOM events found in the log file.")
-        return []  # Return an empty list instead of exiting the script
-
-    # Split the log based on Mem-Info sections
-    mem_info_sections = re.split(mem_info_pattern, log_data)[1:]
-
-    # Extract timestamps and memory info blocks
-    timestamps = mem_info_sections[0::2]
-    mem_info_sections = mem_info_sections[1::2]
-
-    mem_info_list = []
-
-    for timestamp, section in zip(timestamps, mem_info_sections):
-        # Normalize the timestamp (remove unnecessary kernel info if needed)
-        timestamp = re.sub(r'\[\d+\.\d+\]', '', timestamp)  # Handle bracketed timestamps
-
-        # Extract memory information based on predefined patterns
-        memory_info = {}
-        for key, regex in patterns.items():
-            match = re.search(regex, section)
-            if match:
-                memory_info[key] = int(match.group(1))
-            else:
-                memory_info[key] = 0  # Default to 0 if key is missing
-
-        # Initialize accumulators for hugepages across nodes
-        total_hugepages_memory_kb = 0  # To accumulate total hugepage memory across nodes
-        used_hugepages_memory_kb = 0  # To accumulate used hugepage memory across nodes
-
-        # Extract hugepage information for multiple nodes
-        node_sections = re.findall(r'Node \d+ (.*)', section)
-        for node_section in node_sections:
-            hugepages_total = 0
-            hugepages_free = 0
-            hugepages_size_kb = 0
-
-            # Extract the total, free, and size of hugepages for each node
-            match_total = re.search(r'hugepages_total=(\d+)', node_section)
-            match_free = re.search(r'hugepages_free=(\d+)', node_section)
-            match_size = re.search(r'hugepages_size=(\d+)kB', node_section)
-
-            if match_total and match_free and match_size:
-                hugepages_total = int(match_total.group(1))
-                hugepages_free = int(match_free.group(1))
-                hugepages_size_kb = int(match_size.group(1))
-
-                # Calculate used hugepages for the node
-                hugepages_used = hugepages_total - hugepages_free
-
-                # Accumulate totals across nodes
-                total_hugepages_memory_kb += hugepages_total * hugepages_size_kb
-                used_hugepages_memory_kb += hugepages_used * hugepages_size_kb
-
-        # Use the Mem-Info timestamp as the primary reference for the event
-        mem_info_list.append((timestamp, memory_info, total_hugepages_memory_kb, used_hugepages_memory_kb))
-
-    return mem_info_list
+    with file:
+        if os.fstat(file.fileno()).st_size == 0:
+            data = file.read()  # empty or procfs-like files cannot be mapped
+        else:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        pos = data.find(b'Mem-Info')
+        if pos == -1:
+            print("No OOM events found in the log file.")
+            return
+
+        # A Mem-Info line closes the previous section and opens the next one
+        line_start = data.rfind(b'\n', 0, pos) + 1
+        while pos != -1:
+            line_end = data.find(b'\n', pos)
+            if line_end == -1:
+                line_end = len(data)
+            timestamp = data[line_start:line_end].rstrip(b'\r').decode('utf-8', errors='ignore')
+            pos = data.find(b'Mem-Info', line_end)
+            next_start = len(data) if pos == -1 else data.rfind(b'\n', 0, pos) + 1
+            yield extract_memory_info(timestamp, data[line_end + 1:next_start])
+            line_start = next_start
+
+def _int_after(section, anchor):
+    """Returns the integer right after the first occurrence of anchor that has one, or 0."""
+    pos = section.find(anchor)
+    while pos != -1:
+        start = end = pos + len(anchor)
+        while section[end:end + 1].isdigit():
+            end += 1
+        if end > start:
+            return int(section[start:end])
+        pos = section.find(anchor, pos + 1)
+    return 0
+
+def _int_before(section, anchor):
+    """Returns the integer right before the first occurrence of anchor that has one, or 0."""
+    pos = section.find(anchor)
+    while pos != -1:
+        start = pos
+        while section[start - 1:start].isdigit():
+            start -= 1
+        if start < pos:
+            return int(section[start:pos])
+        pos = section.find(anchor, pos + 1)
+    return 0
+
+def extract_memory_info(timestamp, section):
+    """Extracts memory information from one Mem-Info section and normalizes its timestamp."""
+
+    # Normalize the timestamp (remove unnecessary kernel info if needed)
+    timestamp = KERNEL_TIMESTAMP_RE.sub('', timestamp)  # Handle bracketed timestamps
+
+    # Plain "token:N" and "N text" counters are read with find
+    memory_info = {key: _int_after(section, anchor) for key, anchor in int_after_anchors.items()}
+    for key, anchor in int_before_anchors.items():
+        memory_info[key] = _int_before(section, anchor)
+
+    # The remaining fields go through their regex, skipped when the anchor text is absent
+    for key, regex in patterns.items():
+        match = regex.search(section) if pattern_anchors[key] in section else None
+        if match:
+            memory_info[key] = int(match.group(1))
+        else:
+            memory_info[key] = 0  # Default to 0 if key is missing
+
+    # Initialize accumulators for hugepages across nodes
+    total_hugepages_memory_kb = 0  # To accumulate total hugepage memory across nodes
+    used_hugepages_memory_kb = 0  # To accumulate used hugepage memory across nodes
+
+    # Extract hugepage information for multiple nodes, one match per node line
+    for match in node_hugepages_pattern.finditer(section):
+        hugepages_total, hugepages_free, hugepages_size_kb = map(int, match.groups())
+
+        # Accumulate totals and used hugepages across nodes
+        total_hugepages_memory_kb += hugepages_total * hugepages_size_kb
+        used_hugepages_memory_kb += (hugepages_total - hugepages_free) * hugepages_size_kb
+
+    # Use the Mem-Info timestamp as the primary reference for the event
+    return timestamp, memory_info, total_hugepages_memory_kb, used_hugepages_memory_kb
 
 def calculate_memory_usage(memory_info, hugepages_total_kb, hugepages_used_kb,
                            show_full, unit='M', pagesize_kb=4, verbose=False):
@@ -151,18 +167,7 @@ def calculate_memory_usage(memory_info, hugepages_total_kb, hugepages_used_kb,
 
     # Subtract the rest accounted memory
     unaccounted_pages = total_memory_pages \
-        - memory_info['active_anon'] \
-        - memory_info['inactive_anon'] \
-        - memory_info['isolated_anon'] \
-        - memory_info['pagecache'] \
-        - memory_info['swapcache'] \
-        - memory_info['slab_reclaimable'] \
-        - memory_info['slab_unreclaimable'] \
-        - memory_info['pagetables'] \
-        - memory_info['free'] \
-        - memory_info['reserved'] \
-        - memory_info['bounce'] \
-        - memory_info['free_cma'] \
+        - sum(memory_info[key] for key in UNACCOUNTED_FIELDS) \
         - hugepages_total_pages
 
     if verbose:
@@ -181,21 +186,10 @@ def calculate_memory_usage(memory_info, hugepages_total_kb, hugepages_used_kb,
               " - Free Cma"
               " - Huge pages\n")
 
-        print(f"{scale_value(unaccounted_pages, 'P', 'M', pagesize_kb):.2f} = "
-              f"{scale_value(total_memory_pages, 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('active_anon', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('inactive_anon', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('isolated_anon', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('pagecache', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('swapcache', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('slab_reclaimable', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('slab_unreclaimable', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('pagetables', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('free', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('reserved', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('bounce', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(memory_info.get('free_cma', 0), 'P', 'M', pagesize_kb):.2f} "
-              f"- {scale_value(hugepages_total_pages, 'P', 'M', pagesize_kb):.2f}")
+        # The formula is always shown in MiB; convert every term in one pass
+        terms = [total_memory_pages, *(memory_info.get(key, 0) for key in UNACCOUNTED_FIELDS), hugepages_total_pages]
+        print(f"{unaccounted_pages * pagesize_kb / 1024:.2f} = "
+              + " - ".join(f"{pages * pagesize_kb / 1024:.2f}" for pages in terms))
 
     # Return memory summary, total memory details, etc.
     return memory_summary, total_memory_pages, unaccounted_pages
@@ -205,24 +199,22 @@ def print_summary(memory_summary, total_memory_pages, unaccounted_pages, timesta
     """Prints the memory summary in a formatted table and displays the total memory size at the bottom."""
 
     unit_label = {'P': 'Pages', 'K': 'KiB', 'M': 'MB', 'G': 'GB'}.get(unit, 'MB')
+    # Rows are in pages; pages * pagesize_kb / divisor gives the display unit
+    divisor = UNIT_DIVISORS.get(unit, 1)
 
     print(f"\nTimestamp: {timestamp}")
     print(f"{'Category':<25} {unit_label:>15}")
     print("=" * 40)
-    print(f"{'Total Memory':<25}", end=' ')
-    print(f"{scale_value(total_memory_pages, 'P', unit, pagesize_kb):>15,.2f}")
+    print(f"{'Total Memory':<25} {total_memory_pages * pagesize_kb / divisor:>15,.2f}")
 
     for key, pages in memory_summary.items():
-        val = scale_value(pages, 'P', unit, pagesize_kb)
-
-        print(f"{key:<25} {val:>15,.2f}")
+        print(f"{key:<25} {pages * pagesize_kb / divisor:>15,.2f}")
 
     # Footer
     print("=" * 40)
     # Show unaccounted memory if requested
     if show_unaccounted:
-        print(f"{'Unaccounted Memory':<25}", end=' ')
-        print(f"{scale_value(unaccounted_pages, 'P', unit, pagesize_kb):>15,.2f}")
+        print(f"{'Unaccounted Memory':<25} {unaccounted_pages * pagesize_kb / divisor:>15,.2f}")
 
 def main():
     # Use argparse for flexible option parsing
@@ -250,12 +242,8 @@ def main():
     verbose = args.verbose
     unit = args.unit
 
-    # Read and parse the log file
-    log_data = parse_log_file(log_filename)
-    mem_info_list = extract_memory_info(log_data)
-
-    # Iterate over each memory event in the log file
-    for timestamp, memory_info, total_hugepages_kb, used_hugepages_kb in mem_info_list:
+    # Stream the log file and handle each memory event as it is parsed
+    for timestamp, memory_info, total_hugepages_kb, used_hugepages_kb in iter_mem_events(log_filename):
         # Calculate memory usage, now including hugepage memory
         memory_summary, total_memory_pages, unaccounted_pages = calculate_memory_usage(memory_info, total_hugepages_kb, used_hugepages_kb, show_full, unit, pagesize_kb, verbose)
 
@@ -1,41 +1,60 @@
 # config.py
 
-# Predefined patterns to extract specific memory info from log sections
-patterns = {
-    'active_anon': r'active_anon:(\d+)',
-    'inactive_anon': r'inactive_anon:(\d+)',
-    'isolated_anon': r'isolated_anon:(\d+)',
-    'active_file': r'active_file:(\d+)',
-    'inactive_file': r'inactive_file:(\d+)',
-    'isolated_file': r'isolated_file:(\d+)',
-    'unevictable': r'unevictable:(\d+)',
-    'dirty': r'dirty:(\d+)',
-    'writeback': r'writeback:(\d+)',
-    'slab_reclaimable': r'slab_reclaimable:(\d+)',
-    'slab_unreclaimable': r'slab_unreclaimable:(\d+)',
-    'mapped': r'mapped:(\d+)',
-    'shmem': r'shmem:(\d+)',
-    'pagetables': r'pagetables:(\d+)',
-    'bounce': r'bounce:(\d+)',
-    'free': r'free:(\d+)',
-    'free_pcp': r'free_pcp:(\d+)',
-    'free_cma': r'free_cma:(\d+)',
-    'pagecache': r'(\d+) total pagecache pages',
-    'swapcache': r'(\d+) pages in swap cache',
-    'reserved': r'(\d+) pages reserved',
-    'total_pages_ram': r'(\d+) pages RAM',
-    'free_swap': r'Free swap\s*=\s*(\d+)kB',
-    'total_swap': r'Total swap\s*=\s*(\d+)kB',
+import re
+
+# Memory info fields are read from the raw log bytes, so every token and pattern is bytes
+
+# Counters printed as a literal token followed by the integer ("active_anon:N"),
+# read with find instead of the regex engine
+int_after_anchors = {
+    'active_anon': b'active_anon:',
+    'inactive_anon': b'inactive_anon:',
+    'isolated_anon': b'isolated_anon:',
+    'active_file': b'active_file:',
+    'inactive_file': b'inactive_file:',
+    'isolated_file': b'isolated_file:',
+    'unevictable': b'unevictable:',
+    'dirty': b'dirty:',
+    'writeback': b'writeback:',
+    'slab_reclaimable': b'slab_reclaimable:',
+    'slab_unreclaimable': b'slab_unreclaimable:',
+    'mapped': b'mapped:',
+    'shmem': b'shmem:',
+    'pagetables': b'pagetables:',
+    'bounce': b'bounce:',
+    'free': b'free:',
+    'free_pcp': b'free_pcp:',
+    'free_cma': b'free_cma:',
 
     # Add patterns for hugepage-related information
-    'hugepages_total': r'hugepages_total=(\d+)',       # Total hugepages
-    'hugepages_free': r'hugepages_free=(\d+)',         # Free hugepages
-    'hugepages_surp': r'hugepages_surp=(\d+)',         # Surplus hugepages
-    'hugepages_size': r'hugepages_size=(\d+)kB',       # Size of hugepages in kB
+    'hugepages_total': b'hugepages_total=',    # Total hugepages
+    'hugepages_free': b'hugepages_free=',      # Free hugepages
+    'hugepages_surp': b'hugepages_surp=',      # Surplus hugepages
+}
+
+# Counters printed as the integer followed by a literal text ("N pages RAM")
+int_before_anchors = {
+    'pagecache': b' total pagecache pages',
+    'swapcache': b' pages in swap cache',
+    'reserved': b' pages reserved',
+    'total_pages_ram': b' pages RAM',
 }
 
-# Regex to detect the Mem-Info line
-mem_info_pattern = r'(.*Mem-Info.*)'
+# Fields that still need the regex engine, compiled once at import
+patterns = {
+    'free_swap': re.compile(rb'Free swap\s*=\s*(\d+)kB'),
+    'total_swap': re.compile(rb'Total swap\s*=\s*(\d+)kB'),
+    'hugepages_size': re.compile(rb'hugepages_size=(\d+)kB'),   # Size of hugepages in kB
+}
+
+# Literal text each pattern needs; a section without it cannot match, so the regex is skipped
+pattern_anchors = {
+    'free_swap': b'Free swap',
+    'total_swap': b'Total swap',
+    'hugepages_size': b'hugepages_size=',
+}
 
-# Regex to detect the OOM invocation line
-oom_pattern = r'(.* invoked oom-killer:.*)'
+# Per-node hugepage line; the kernel prints total, free and size in this order
+node_hugepages_pattern = re.compile(
+    rb'Node \d+ .*?hugepages_total=(\d+).*?hugepages_free=(\d+).*?hugepages_size=(\d+)kB'
+)